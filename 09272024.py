@@ -1,9 +1,29 @@
 import os
+import numpy as np
 import pandas as pd
-from sdv.single_table import GaussianCopulaSynthesizer
-from sdv.metadata import SingleTableMetadata
-from sdv.evaluation.single_table import run_diagnostic, evaluate_quality
+# sdv (and torch through CTGAN) is imported inside the synthesis and evaluation
+# functions, so parse-only runs do not pay for loading it
 import util as ut
+import synth_planner as sp
+import parse_cache as pc
+import compressed_io as cio
+import pipeline as pl
+import memory_budget as mb
+import layout_codec as lc
+import preprocessing as pp
+import parallel_parse as par
+import progressive_fit as pf
+import work_queue as wq
+import column_profiler as cp
+import hashlib
+import json
+import pickle
+import tempfile
+import multiprocessing
+import functools
+import itertools
+import collections
+from concurrent.futures import ProcessPoolExecutor
 import random
 import time
 # File paths
@@ -15,11 +35,80 @@ file_layout = r"C:\Users\saman\OneDrive\Desktop\project-x\file_layout.csv"
 file_path = r"C:\Users\saman\OneDrive\Desktop\project-x\sample.txt"
 # header_layout_file = r"C:\Users\saman\OneDrive\Desktop\project-x\header-layout.csv"
 metadata_base_path = r"C:\Users\saman\OneDrive\Desktop\project-x\metadata"
+layout_cache_dir = r"C:\Users\saman\OneDrive\Desktop\project-x\layout_cache"
+synth_history_dir = r"C:\Users\saman\OneDrive\Desktop\project-x\synth_history"
 
+parse_cache_dir = r"C:\Users\saman\OneDrive\Desktop\project-x\parse_cache"
+partition_queue_dir = r"C:\Users\saman\OneDrive\Desktop\project-x\partition_queue"
+
+# Disk quota for cached parsed frames in bytes; None disables the cache
+parse_cache_quota = pc.DEFAULT_QUOTA_BYTES
+
+# Wall-clock budget in seconds for fit+sample; None keeps GaussianCopula
+synthesis_time_budget = None
+
+
+# Training sizes for progressive fitting, e.g. pf.DEFAULT_STEPS; None fits on every row
+progressive_fit_steps = None
+
+# Fit one synthesizer per partition of the DE table, drained from a filesystem work queue
+partitioned_mode = False
+# Key column(s) to partition by; None uses the layout fields that carry a Block_ID
+partition_key_columns = None
+partition_workers = os.cpu_count() or 1
+# Partitions with fewer rows are merged into one shared partition
+min_partition_rows = 50
+
+# Run read/parse, sample, format and write as concurrent stages
+pipelined_mode = False
+pipeline_batch_rows = 50000
+pipeline_workers = os.cpu_count() or 1
+
+# Worker processes for parsing the input at newline-aligned byte offsets; None parses in-process
+parallel_parse_workers = None
+
+# RSS ceiling in bytes; None disables the memory budget
+memory_budget_bytes = None
+# What to do when the full-frame path would exceed the budget: 'chunked' or 'fail'
+memory_budget_fallback = 'chunked'
+# Rows of a uniform sample the chunked fallback fits on, instead of holding the whole DE table
+chunked_fit_rows = 200000
+
+# Overpunch amount columns modelled as continuous values and re-encoded on write
+overpunch_columns = ['net_amount_due']
+
+#date_columns = ['date_of_birth','date_of_service','billing_cycle_end_date','check_date','date_prescription_written','invoiced_date','cardholder_date_of_birth','adjudication_date']  # Replace with actual column names that are dates  # Replace with actual date column names
+date_columns = ['da']  # Replace with actual column names that are dates  # Replace with actual date column names
+
+# Profile columns with streaming sketches while parsing (adds parse time); saved next to the metadata versions
+profile_columns = False
+# Compare column profiles instead of running the full SDV diagnostic and quality report
+quick_evaluation = False
+
+# Emit this many times the input row count from one fitted model (load-test volume); 1 mirrors the input
+scale_factor = 1
+sampling_workers = os.cpu_count() or 1
+# Base seed; every sampling batch derives its own seed from it, so scaled runs are reproducible
+sampling_seed = 42
+
+# Parse and synthesize only records appended since the last run, resuming from a checkpoint beside the output
+incremental_mode = False
+
+# Output compression extension ('.gz', '.bz2', '.xz'); None writes plain text
+output_compression = None
+
+# Overpunch amount columns summed into the PT trailer (net, gross, patient paid); absent columns total 0
+trailer_amount_columns = ('net_amount_due', 'gross_amount_due', 'patient_pay_amount')
+
+# Split the output into this many shard files written in parallel, plus a manifest; None writes one file
+output_shards = None
+shard_workers = os.cpu_count() or 1
+# Which shards carry the passthrough CD records: 'all', 'first' or None
+shard_cd_records = 'all'
 
 # Create output file path
-base_name = os.path.splitext(os.path.basename(file_path))[0]
-output_file_path = os.path.join(os.path.dirname(file_path), f"{base_name}_syn.txt")
+base_name = os.path.splitext(os.path.basename(cio.strip_compression_suffix(file_path)))[0]
+output_file_path = os.path.join(os.path.dirname(file_path), f"{base_name}_syn.txt{output_compression or ''}")
 
 ################## Custom Functions ##############
 def generate_random_number(length):
@@ -46,50 +135,37 @@ def save_new_metadata_version(base_path, metadata, metadata_type):
     metadata.save_to_json(filepath=new_metadata_path)
     print(f"New {metadata_type} metadata saved as {new_metadata_path}")
 
+def profile_path(base_path, metadata_type):
+    # Column profile of the latest parsed input, stored beside metadata_<type>_vN.json
+    return f"{base_path}_{metadata_type}_profile.json"
+
+def new_data_profile():
+    # Empty DE profile; overpunch amounts are decoded so their quantiles are numeric
+    return cp.TableProfile(date_columns, {column: pp.overpunch_amounts for column in overpunch_columns})
+
 def read_file_layout(file_layout):
-    # Load the layout CSV file into a DataFrame
+    # Compile the layout CSV file into a codec shared by the parser and writer
     print("Loading the file layout...")
-    layout = pd.read_csv(file_layout).rename(columns=lambda x: x.strip())
+    codec = lc.compile_layout(file_layout, layout_cache_dir)
     print("File layout loaded successfully.")
-    return layout
+    return codec
 
-def read_file_data(file_path):
-    # Load the sample data from the specified file
-    print("Loading file data...")
-    with open(file_path, 'r') as infile:
-        raw_data = infile.readlines()
-    print("File data loaded successfully.")
-    return raw_data
-
-def process_cd_records(data):
+def process_cd_records(data, codec):
     # Process records that start with "CD100" into a DataFrame
     print("Processing CE records...")
-    ce_rows = []
-    
-    for line in data:
-        if line.startswith("CD"):  
-            row_data = {"CD_Record": line.strip()}  
-            ce_rows.append(row_data)
-
-    cd_df = pd.DataFrame(ce_rows)
+    ce_rows = [line.strip() for line in data if codec.is_passthrough(line)]
+    cd_df = pd.DataFrame({"CD_Record": ce_rows})
     print("CE records processed into DataFrame.")
     return cd_df
 
-def process_file_data(data, layout, date_columns=[]):
-    # Process the sample data according to the specified layout
+def process_file_data(data, codec, record_type, date_columns=[], profile=None):
+    # Process the sample data according to the specified layout, feeding the decoded columns to the profile
     print("Processing data...")
-    data_rows = []
-    for line in data:
-        if not line.startswith("CD"):
-            current_position = 0
-            row_data = {}
-            for _, row in layout.iterrows():
-                column_name = row['Column_Name']
-                length = row['Length']
-                row_data[column_name] = line[current_position:current_position + length].strip()
-                current_position += length
-            data_rows.append(row_data)
-    df = pd.DataFrame(data_rows)
+    lines = [line for line in data if not codec.is_passthrough(line) and not codec.is_trailer(line)]
+    columns = codec.decode_columns(lines, record_type)
+    if profile is not None:
+        profile.update_columns(columns)
+    df = pd.DataFrame(columns, columns=codec.columns(record_type))
 
     # Handle date columns
     for column in date_columns:
@@ -100,9 +176,9 @@ def process_file_data(data, layout, date_columns=[]):
     print("Data processed into DataFrame.")
     return df
 
-def generate_synthetic_data(df, metadata_base_path, metadata_type, use_same_metadata_version=True):
-    # Generate synthetic data using the SDV library
-    print(f"Generating synthetic data for {metadata_type} using SDV...")
+def load_metadata(df, metadata_base_path, metadata_type, use_same_metadata_version=True, profile=None):
+    # Load the latest metadata version, or detect (from the column profile when given) and save a new one
+    from sdv.metadata import SingleTableMetadata
     metadata = SingleTableMetadata()
     latest_version = get_latest_metadata_version(metadata_base_path, metadata_type)
 
@@ -112,133 +188,785 @@ def generate_synthetic_data(df, metadata_base_path, metadata_type, use_same_meta
         metadata = SingleTableMetadata.load_from_json(filepath=latest_metadata_path)
     else:
         print(f"No existing {metadata_type} metadata found or creating new metadata.")
-        metadata.detect_from_dataframe(df)
+        if profile is not None:
+            metadata = SingleTableMetadata.load_from_dict(cp.infer_metadata(profile))
+        else:
+            metadata.detect_from_dataframe(df)
         save_new_metadata_version(metadata_base_path, metadata, metadata_type)
+    return metadata
 
-    # Preserve original empty values
-    for column in df.columns:
+def preserve_empty_values(df):
+    # Mark empty values as pd.NA without copying or mutating the caller's frame;
+    # only object columns that actually contain nulls are replaced, on a shallow copy
+    null_columns = [column for column in df.columns
+                    if df[column].dtype == object and df[column].isna().any()]
+    if not null_columns:
+        return df
+    df = df.copy(deep=False)
+    for column in null_columns:
         df[column] = df[column].where(df[column].notna(), pd.NA)
+    return df
+
+def generate_synthetic_data(df, metadata_base_path, metadata_type, use_same_metadata_version=True, time_budget=None,
+                            progressive_steps=None, profile=None):
+    # Generate synthetic data using the SDV library
+    print(f"Generating synthetic data for {metadata_type} using SDV...")
+    from sdv.single_table import GaussianCopulaSynthesizer
+    metadata = load_metadata(df, metadata_base_path, metadata_type, use_same_metadata_version, profile)
 
-    synthesizer = GaussianCopulaSynthesizer(metadata)
-    synthesizer.fit(df)
-    synthetic_data = synthesizer.sample(num_rows=len(df))
+    if progressive_steps:
+        # Progressive fitting picks its own training size, then samples the full row count
+        synthetic_data = fit_synthesizer(df, metadata, time_budget, progressive_steps, profile).sample(num_rows=len(df))
+        print(f"Synthetic {metadata_type} data generated.")
+        return synthetic_data, metadata
+
+    df = preserve_empty_values(df)
+    # Decode overpunch amounts and tame high-cardinality strings before fitting
+    train_df, fit_metadata, plan = pp.prepare_for_fit(df, metadata, overpunch_columns, profile)
+
+    if time_budget is not None:
+        # Let the planner choose the best synthesizer that fits the budget
+        candidate, table = sp.plan_synthesizer(train_df, time_budget, synth_history_dir)
+        synthetic_data = sp.fit_and_sample(candidate, fit_metadata, train_df, len(df), table, synth_history_dir)
+    else:
+        synthesizer = GaussianCopulaSynthesizer(fit_metadata)
+        synthesizer.fit(train_df)
+        synthetic_data = synthesizer.sample(num_rows=len(df))
+    synthetic_data = pp.restore_after_sample(synthetic_data, plan, df.columns)
     print(f"Synthetic {metadata_type} data generated.")
     return synthetic_data, metadata
 
+def fit_synthesizer(df, metadata, time_budget=None, progressive_steps=None, profile=None, record_timing=True):
+    # Fit a synthesizer without sampling, so rows can be drawn in batches later.
+    # record_timing=False keeps fits that say nothing about data tables (headers) out of the planner history
+    from sdv.single_table import GaussianCopulaSynthesizer
+    df = preserve_empty_values(df)
+    train_df, fit_metadata, plan = pp.prepare_for_fit(df, metadata, overpunch_columns, profile)
+
+    if time_budget is not None:
+        candidate, table = sp.plan_synthesizer(train_df, time_budget, synth_history_dir)
+        make_synthesizer = functools.partial(sp.create_synthesizer, candidate, fit_metadata)
+    else:
+        candidate, table = sp.BASELINE_CANDIDATE, None
+        make_synthesizer = functools.partial(GaussianCopulaSynthesizer, fit_metadata)
+
+    start_time = time.time()
+    if progressive_steps:
+        synthesizer, _ = pf.progressive_fit(train_df, fit_metadata, make_synthesizer, progressive_steps)
+    else:
+        synthesizer = make_synthesizer()
+        synthesizer.fit(train_df)
+    # Rows are drawn later, often in batches or other processes, so only the fit is recorded for the planner.
+    # A progressive loop runs several fits and evaluations, which is not the cost of one fit on train_df
+    if record_timing and not progressive_steps:
+        sp.record_run(synth_history_dir, candidate["name"], table or sp.describe_table(train_df), time.time() - start_time)
+    return pp.PreprocessedSynthesizer(synthesizer, plan, df.columns)
+
 def evaluate_synthetic_data(df, synthetic_data, metadata):
     # Evaluate the quality of the synthetic data
     print("Evaluating synthetic data quality...")
+    from sdv.evaluation.single_table import run_diagnostic, evaluate_quality
     diagnostic = run_diagnostic(real_data=df, synthetic_data=synthetic_data, metadata=metadata)
     quality_report = evaluate_quality(df, synthetic_data, metadata)
     print("Evaluation complete.")
     return diagnostic, quality_report
 
+def profile_synthetic_data(synthetic_data, date_columns=[]):
+    # Profile sampled rows in their written string form, so they compare with the parsed profile
+    profile = new_data_profile()
+    columns = {}
+    for column in synthetic_data.columns:
+        values = synthetic_data[column]
+        if column in date_columns:
+            values = pd.to_datetime(values, errors='coerce').dt.strftime('%Y%m%d')
+        columns[column] = [str(value) for value in values.astype(object).where(values.notna(), '')]
+    profile.update_columns(columns)
+    return profile
+
+def quick_evaluate(profile, synthetic_data, date_columns=[]):
+    # Quick fidelity check from column profiles; the real data is not rescanned
+    print("Comparing column profiles of real and synthetic data...")
+    score, details = cp.compare_profiles(profile, profile_synthetic_data(synthetic_data, date_columns))
+    for column, detail in details.items():
+        print(f"  {column}: {detail}")
+    print(f"Profile fidelity score: {score:.4f}")
+    return score, details
+
 ########################### Build Trailer ###################################
+def amount_total(values):
+    # Sum overpunch amount strings with util.get_return_value; blanks and non-strings count as 0
+    return int(round(sum(ut.get_return_value(value) for value in values if isinstance(value, str) and value)))
+
+# Trailer columns already reported missing by this process
+_missing_trailer_columns = set()
+
+def trailer_totals(df):
+    # Amount totals for the PT record, in trailer order; a configured column missing from the layout
+    # totals 0 and is reported once, since a misspelt name would otherwise zero every trailer silently
+    missing = [column for column in trailer_amount_columns if column not in df.columns and column not in _missing_trailer_columns]
+    if missing:
+        _missing_trailer_columns.update(missing)
+        print(f"Warning: trailer amount columns {missing} are not in the layout; their trailer totals will be 0.")
+    return [amount_total(df[column]) if column in df.columns else 0 for column in trailer_amount_columns]
+
 def build_page_trailer(df):
     # Build the page trailer with summaries of the relevant columns
     record_count = len(df)
+    net_amount_due_sum, gross_amount_due_sum, pat_paid_amount_sum = trailer_totals(df)
+    return format_page_trailer(record_count, net_amount_due_sum, gross_amount_due_sum, pat_paid_amount_sum)
 
-    df['net_amount_due'] = 0#df['net_amount_due'].apply(ut.get_return_value)
-    df['gross_amount_due'] = 0 
-    df['patient_pay_amount'] = 0 
-
-    df['net_amount_due'] = pd.to_numeric(df['net_amount_due'], errors='coerce')
-    net_amount_due_sum = df['net_amount_due'].sum() if 'net_amount_due' in df.columns else 0
-    gross_amount_due_sum = 0 
-    pat_paid_amount_sum = 0 
+def trailer_field(value, width, signed=True):
+    # Zero-filled trailer field; negative amounts carry their sign as an overpunch on the last digit.
+    # Raise instead of letting a wide value shift every later field of the fixed-width record.
+    value = int(value)
+    if len(str(abs(value))) > width or (value < 0 and not signed):
+        raise ValueError(f"Trailer value {value} does not fit a {width}-character field")
+    return pp.encode_overpunch(value, width, "digit")
 
+def format_page_trailer(record_count, net_amount_due_sum=0, gross_amount_due_sum=0, pat_paid_amount_sum=0):
+    # Format the fixed-width PT record from the trailer totals
     trailer_data = (
         "PT" +
-        str(record_count).zfill(10) +                         
-        str(int(net_amount_due_sum)).zfill(11) +              
+        trailer_field(record_count, 10, signed=False) +
+        trailer_field(net_amount_due_sum, 11) +
         "A" +
-        str(int(gross_amount_due_sum)).zfill(11) +            
+        trailer_field(gross_amount_due_sum, 11) +
         "G" +
-        str(int(pat_paid_amount_sum)).zfill(11) + "D"         
+        trailer_field(pat_paid_amount_sum, 11) + "D"
     )
 
     return trailer_data.ljust(48)[:48]
 
 ########################### Write file ######################################
-def write_output_file(output_file_path, synthetic_data, cd_df, layout, synthetic_header, header_layout, date_columns=[]):
+def format_data_records(synthetic_data, codec, date_columns=[]):
+    # Format synthetic DE rows as fixed-width lines, column by column
+    columns = {}
+    for column_name in codec.columns("DE"):
+        values = synthetic_data[column_name]
+        if column_name in date_columns:
+            values = pd.to_datetime(values, errors='coerce').dt.strftime('%Y%m%d')
+        columns[column_name] = values.astype(object).where(values.notna(), '')
+    return "".join(line + '\n' for line in codec.encode_columns(columns, "DE"))
+
+def format_header_records(synthetic_header, codec):
+    # Format synthetic header rows as fixed-width lines
+    return "".join(line + '\n' for line in codec.encode_columns(synthetic_header, "HDR"))
+
+def write_output_file(output_file_path, synthetic_data, cd_df, codec, synthetic_header, date_columns=[]):
     # Write the synthetic data, header, and trailer to the output file
     print("Writing output to file...")
-    with open(output_file_path, 'w') as outfile:
+    with cio.open_output_atomic(output_file_path) as outfile:
         # Write synthetic header
-        for _, row in synthetic_header.iterrows():
-            transformed_data = "".join(str(row[layout_row['Column_Name']]).ljust(layout_row['Length'])
-                                       for _, layout_row in header_layout.iterrows())
-            outfile.write(transformed_data + '\n')
+        outfile.write(format_header_records(synthetic_header, codec))
 
         # Write synthetic data
-        for _, row in synthetic_data.iterrows():
-            transformed_data = ""
-            for column_name, length in zip(layout['Column_Name'], layout['Length']):
-                value = row[column_name]
-                if pd.notna(value):
-                    if column_name in date_columns:
-                        value = value.strftime('%Y%m%d')  
-                    transformed_data += str(value).ljust(length)
-                else:
-                    transformed_data += ''.ljust(length)
-            outfile.write(transformed_data + '\n')
+        outfile.write(format_data_records(synthetic_data, codec, date_columns))
 
         # Write synthetic data for CE records
-        for _, row in cd_df.iterrows():
-            transformed_data = row['CD_Record'].strip()  
-            outfile.write(transformed_data + '\n')
+        outfile.write("".join(record + '\n' for record in cd_df['CD_Record']))
 
         # Build and write page trailer
         trailer_record = build_page_trailer(synthetic_data)
         outfile.write(trailer_record + '\n')
 
     print(f"Data written to {output_file_path}.")
+
+########################### Sharded output ##################################
+def shard_path(output_file_path, shard_index):
+    # sample_syn.txt.gz -> sample_syn_part001.txt.gz
+    compression = cio.compression_from_extension(output_file_path) or ''
+    stem, extension = os.path.splitext(cio.strip_compression_suffix(output_file_path))
+    return f"{stem}_part{shard_index + 1:03d}{extension}{compression}"
+
+def manifest_path(output_file_path):
+    stem = os.path.splitext(cio.strip_compression_suffix(output_file_path))[0]
+    return f"{stem}_manifest.json"
+
+def write_shard(codec, date_columns, header_text, shard):
+    # Worker: write one shard with its own header, CD records and trailer; returns its manifest entry
+    path, shard_data, cd_text = shard
+    totals = trailer_totals(shard_data)
+    # Format the trailer first so an overflowing total fails before anything is written
+    trailer_text = format_page_trailer(len(shard_data), *totals) + '\n'
+    with cio.open_output_atomic(path) as outfile:
+        outfile.write(header_text)
+        outfile.write(format_data_records(shard_data, codec, date_columns))
+        outfile.write(cd_text)
+        outfile.write(trailer_text)
+    entry = {"file": os.path.basename(path), "rows": len(shard_data)}
+    entry.update(zip(trailer_amount_columns, totals))
+    return entry
+
+def write_sharded_output(output_file_path, synthetic_data, cd_df, codec, synthetic_header, date_columns=[],
+                         shards=output_shards, workers=shard_workers):
+    # Split the synthetic records into contiguous shards, write them in parallel and record a manifest
+    print(f"Writing output to {shards} shards...")
+    header_text = format_header_records(synthetic_header, codec)
+    cd_text = "".join(record + '\n' for record in cd_df['CD_Record'])
+    bounds = [len(synthetic_data) * index // shards for index in range(shards + 1)]
+    tasks = []
+    for index in range(shards):
+        shard_cd_text = cd_text if shard_cd_records == 'all' or (shard_cd_records == 'first' and index == 0) else ""
+        tasks.append((shard_path(output_file_path, index), synthetic_data.iloc[bounds[index]:bounds[index + 1]],
+                      shard_cd_text))
+
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, shards))) as executor:
+        entries = list(executor.map(functools.partial(write_shard, codec, date_columns, header_text), tasks))
+
+    manifest = {"shards": entries, "rows": sum(entry["rows"] for entry in entries)}
+    manifest.update({column: sum(entry[column] for entry in entries) for column in trailer_amount_columns})
+    with open(manifest_path(output_file_path), 'w') as outfile:
+        json.dump(manifest, outfile, indent=4)
+    print(f"Data written to {shards} shards; manifest saved as {manifest_path(output_file_path)}.")
+    return manifest
 #############################################################################
 
-import time  # Add this import at the top of your script
+########################### Partitioned mode ################################
+def split_partitions(df, key_columns, min_rows=min_partition_rows):
+    # Split the table by key columns in first-appearance order; small groups share one partition
+    partitions, small = [], []
+    for key, index in df.groupby(key_columns, sort=False, dropna=False).groups.items():
+        (partitions if len(index) >= min_rows else small).append((key, index))
+    frames = [(f"part_{number:05d}", df.loc[index]) for number, (_, index) in enumerate(partitions)]
+    if small:
+        frames.append((f"part_{len(frames):05d}", df.loc[[row for _, index in small for row in index]]))
+    return frames
 
-def main(use_same_metadata_version=True):
-    # Track the total execution time
-    total_start_time = time.time()  # Start the total timer
-    print('############################################################################')
+def synthesize_partition(payload):
+    # Work queue handler: fit and sample one partition
+    partition_df = payload["data"]
+    metadata = load_metadata(partition_df, payload["metadata_base_path"], "data", use_same_metadata_version=True)
+    synthesizer = fit_synthesizer(partition_df, metadata, payload["time_budget"])
+    return synthesizer.sample(num_rows=len(partition_df))
+
+def drain_partition_queue(queue_dir, wait=False):
+    # Worker loop; other processes or hosts on the same storage can run it too (see partition_worker.py)
+    processed = wq.drain(queue_dir, synthesize_partition, wait=wait)
+    print(f"Worker {os.getpid()} processed {processed} partitions.")
+
+def run_partitioned(tabluar_df, codec, key_columns, use_same_metadata_version, time_budget, workers=partition_workers,
+                    profile=None):
+    # Fit and sample every partition through the work queue and stitch the results back in order
+    key_columns = key_columns or codec.block_key_columns("DE")
+    if not key_columns:
+        raise ValueError("Partitioned mode needs partition_key_columns or Block_ID fields in the layout")
+    # Make sure metadata exists before workers start, so they never race to create a version
+    data_metadata = load_metadata(tabluar_df, metadata_base_path, "data", use_same_metadata_version, profile)
+
+    queue_dir = os.path.join(partition_queue_dir, f"{codec.layout_hash[:12]}_{int(time.time())}_{os.getpid()}")
+    wq.create_queue(queue_dir)
+    partitions = split_partitions(tabluar_df, key_columns)
+    for partition_id, partition_df in partitions:
+        wq.enqueue(queue_dir, partition_id, {
+            "data": partition_df,
+            "metadata_base_path": metadata_base_path,
+            "time_budget": time_budget,
+        })
+    print(f"Queued {len(partitions)} partitions by {key_columns} in {queue_dir}")
+
+    processes = [multiprocessing.Process(target=drain_partition_queue, args=(queue_dir,))
+                 for _ in range(min(workers, len(partitions)))]
+    for process in processes:
+        process.start()
+    reaped = set()
+
+    def check_workers():
+        # A local worker killed mid-task (e.g. by the OOM killer) never finishes its claim; fail it instead of waiting
+        for process in processes:
+            if process.exitcode not in (None, 0) and process.pid not in reaped:
+                reaped.add(process.pid)
+                wq.fail_abandoned(queue_dir, wq.worker_id(process.pid), f"Worker exited with code {process.exitcode}")
+        if not any(process.is_alive() for process in processes):
+            # No local worker left: process whatever is pending, including tasks requeued after a lease expired
+            wq.drain(queue_dir, synthesize_partition)
+
+    try:
+        wq.wait_for_tasks(queue_dir, [partition_id for partition_id, _ in partitions], on_poll=check_workers)
+        synthetic_data = pd.concat([wq.load_result(queue_dir, partition_id) for partition_id, _ in partitions],
+                                   ignore_index=True)
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+        # The queue holds pickled copies of the raw partitions and their results
+        wq.remove_queue(queue_dir)
+    return synthetic_data, data_metadata
+
+########################### Pipelined mode ##################################
+def read_line_batches(file_path, batch_rows):
+    # Yield (batch_index, lines) batches from the input file
+    lines = cio.read_lines(file_path)
+    for batch_index in itertools.count():
+        batch = list(itertools.islice(lines, batch_rows))
+        if not batch:
+            return
+        yield batch_index, batch
+
+def parse_line_batch(codec, date_columns, indexed_batch):
+    # Parse one batch into header, DE and CD frames plus the batch's DE column profile;
+    # the header is the file's first line
+    batch_index, lines = indexed_batch
+    header_df = None
+    if batch_index == 0:
+        header_df = process_file_data(lines[:1], codec, "HDR")
+        lines = lines[1:]
+    profile = new_data_profile() if profile_columns else None
+    tabluar_df = process_file_data(lines, codec, "DE", date_columns, profile)
+    return header_df, tabluar_df, process_cd_records(lines, codec), profile
+
+def merge_batch_profiles(parsed_batches):
+    # Combine the per-batch profiles; every sketch is mergeable, so no rows are revisited
+    profiles = [batch[3] for batch in parsed_batches if batch[3] is not None]
+    if not profiles:
+        return None
+    return functools.reduce(cp.TableProfile.merge, profiles[1:], profiles[0])
+
+def combine_parsed_batches(parsed_batches):
+    # Stitch (header, DE, CD, profile) batch results back into whole frames in file order
+    header_df = parsed_batches[0][0]
+    tabluar_df = pd.concat([parsed[1] for parsed in parsed_batches], ignore_index=True)
+    cd_df = pd.concat([parsed[2] for parsed in parsed_batches], ignore_index=True)
+    return header_df, tabluar_df, cd_df, merge_batch_profiles(parsed_batches)
+
+def parse_file_batches(file_path, codec, date_columns, batch_rows=None):
+    # Parse batches as they stream out of cio.read_lines, so background decompression overlaps parsing
+    batches = read_line_batches(file_path, batch_rows or pipeline_batch_rows)
+    return combine_parsed_batches([parse_line_batch(codec, date_columns, batch) for batch in batches])
+
+def sample_batch_sizes(total_rows, batch_rows):
+    # Split the requested row count into sampling batches
+    for start in range(0, total_rows, batch_rows):
+        yield min(batch_rows, total_rows - start)
+
+def format_record_batch(codec, date_columns, synthetic_batch):
+    # Format a sampled batch, returning its row count and trailer totals alongside the text
+    return len(synthetic_batch), trailer_totals(synthetic_batch), format_data_records(synthetic_batch, codec, date_columns)
+
+def reservoir_update(reservoir, batch, fit_rows, rng):
+    # Uniform sample of at most fit_rows rows across batches: every row draws a random key
+    # and the rows with the smallest keys are kept
+    keyed = batch.assign(_reservoir_key=rng.random(len(batch)))
+    if reservoir is not None:
+        keyed = pd.concat([reservoir, keyed], ignore_index=True)
+    return keyed.nsmallest(fit_rows, "_reservoir_key") if len(keyed) > fit_rows else keyed
+
+def run_pipelined(use_same_metadata_version, time_budget, codec, date_columns, budget=None, progressive_steps=None,
+                  fit_rows=None):
+    # Overlap reading/parsing and sampling/formatting/writing through bounded queues.
+    # With fit_rows, parsed batches are folded into a bounded uniform sample instead of one full DE table.
+    budget = budget or mb.MemoryBudget()
     start_time = time.time()
-    file_layout_df = read_file_layout(file_layout)
-    hdr_file_layout = file_layout_df[file_layout_df['Type'] == 'HDR']
-    de_file_layout = file_layout_df[file_layout_df['Type'] == 'DE']
-    print(f"Time taken to read file layout to dataframe: {time.time() - start_time:.2f} seconds")
+    with budget.stage("parse"):
+        collected = {"header": None, "data": [], "reservoir": None, "cd": [], "profile": None, "rows": 0}
+        rng = np.random.default_rng(sampling_seed)
+
+        def collect_batch(batch):
+            header_df, batch_df, batch_cd_df, batch_profile = batch
+            if header_df is not None:
+                collected["header"] = header_df
+            collected["rows"] += len(batch_df)
+            collected["cd"].append(batch_cd_df)
+            if batch_profile is not None:
+                collected["profile"] = batch_profile if collected["profile"] is None \
+                    else collected["profile"].merge(batch_profile)
+            if fit_rows is None:
+                collected["data"].append(batch_df)
+            else:
+                collected["reservoir"] = reservoir_update(collected["reservoir"], batch_df, fit_rows, rng)
+
+        stages = [
+            pl.Stage("parse", functools.partial(parse_line_batch, codec, date_columns),
+                     workers=pipeline_workers, use_processes=True),
+            pl.Stage("collect", collect_batch),
+        ]
+        _, metrics = pl.run_pipeline(read_line_batches(file_path, pipeline_batch_rows), stages, name="ingest")
+        pl.print_metrics(metrics, title="Ingest")
+        header_df = collected["header"]
+        if fit_rows is None:
+            tabluar_df = pd.concat(collected["data"], ignore_index=True)
+        else:
+            tabluar_df = collected["reservoir"].drop(columns="_reservoir_key").reset_index(drop=True)
+            print(f"Fitting on a uniform sample of {len(tabluar_df)} of {collected['rows']} rows.")
+        total_rows = collected["rows"]
+        cd_df = pd.concat(collected["cd"], ignore_index=True)
+        data_profile = collected["profile"]
+        del collected
+        if data_profile is not None:
+            data_profile.save(profile_path(metadata_base_path, "data"))
+    print(f"Time taken to read and parse input: {time.time() - start_time:.2f} seconds")
     print('############################################################################')
+
     start_time = time.time()
-    raw_df = read_file_data(file_path)
-    print(f"Time taken to load file data: {time.time() - start_time:.2f} seconds")
+    with budget.stage("fit"):
+        synthetic_header_df, _ = generate_synthetic_data(
+            header_df, metadata_base_path, metadata_type="header", use_same_metadata_version=use_same_metadata_version
+        )
+        data_metadata = load_metadata(tabluar_df, metadata_base_path, "data", use_same_metadata_version, data_profile)
+        synthesizer = fit_synthesizer(tabluar_df, data_metadata, time_budget, progressive_steps, data_profile)
+    print(f"Time taken to fit synthesizers: {time.time() - start_time:.2f} seconds")
     print('############################################################################')
+
     start_time = time.time()
-    header_df = process_file_data([raw_df[0]], hdr_file_layout)
-    print(f"Time taken to process header data: {time.time() - start_time:.2f} seconds")
-    
+    written_rows = [0]
+    written_totals = [0] * len(trailer_amount_columns)
+
+    with budget.stage("emit"):
+        with cio.open_output_atomic(output_file_path) as outfile:
+            outfile.write(format_header_records(synthetic_header_df, codec))
+
+            def sample_rows(num_rows):
+                budget.check("sample")
+                return synthesizer.sample(num_rows=num_rows)
+
+            def write_records(records):
+                outfile.write(records[2])
+                written_rows[0] += records[0]
+                written_totals[:] = [total + batch_total for total, batch_total in zip(written_totals, records[1])]
+
+            stages = [
+                pl.Stage("sample", sample_rows),
+                pl.Stage("format", functools.partial(format_record_batch, codec, date_columns),
+                         workers=pipeline_workers, use_processes=True),
+                pl.Stage("write", write_records),
+            ]
+            _, metrics = pl.run_pipeline(sample_batch_sizes(total_rows, pipeline_batch_rows), stages, name="emit")
+
+            outfile.write("".join(record + '\n' for record in cd_df['CD_Record']))
+            outfile.write(format_page_trailer(written_rows[0], *written_totals) + '\n')
+    pl.print_metrics(metrics, title="Emit")
+    print(f"Time taken to sample and write output file: {time.time() - start_time:.2f} seconds")
+
+########################### Scaled sampling #################################
+_worker_synthesizer = None
+
+def derive_seed(base_seed, batch_index):
+    # Stable 32-bit seed per batch, independent of which worker samples it
+    return random.Random(f"{base_seed}:{batch_index}").getrandbits(32)
+
+def load_sampling_worker(model_path):
+    # Worker initializer: load the fitted synthesizer once per process
+    global _worker_synthesizer
+    with open(model_path, 'rb') as infile:
+        _worker_synthesizer = pickle.load(infile)
+
+def sample_scaled_batch(codec, date_columns, base_seed, indexed_size):
+    # Worker: sample one batch with its derived seed and format it; only text returns to the writer
+    batch_index, num_rows = indexed_size
+    _worker_synthesizer.reseed(derive_seed(base_seed, batch_index))
+    return format_record_batch(codec, date_columns, _worker_synthesizer.sample(num_rows=num_rows))
+
+def stream_scaled_records(synthesizer, num_rows, codec, date_columns, workers=sampling_workers, seed=sampling_seed):
+    # Yield (row_count, totals, text) batches in order, sampled in worker processes that share one fitted model
+    model_fd, model_path = tempfile.mkstemp(suffix=".pkl")
+    try:
+        with os.fdopen(model_fd, 'wb') as outfile:
+            pickle.dump(synthesizer, outfile)
+        batches = enumerate(sample_batch_sizes(num_rows, pipeline_batch_rows))
+        sample_batch = functools.partial(sample_scaled_batch, codec, date_columns, seed)
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_sampling_worker,
+                                 initargs=(model_path,)) as executor:
+            # Keep a bounded window of batches in flight so memory does not grow with the row count
+            pending = collections.deque()
+            for batch in itertools.islice(batches, 2 * workers):
+                pending.append(executor.submit(sample_batch, batch))
+            while pending:
+                records = pending.popleft().result()
+                for batch in itertools.islice(batches, 1):
+                    pending.append(executor.submit(sample_batch, batch))
+                yield records
+    finally:
+        os.remove(model_path)
+
+def run_scaled(tabluar_df, cd_df, codec, synthetic_header, scale, use_same_metadata_version, time_budget,
+               progressive_steps=None, profile=None, budget=None):
+    # Fit once, then sample scale x the input rows across worker processes and stream them into the output
+    budget = budget or mb.MemoryBudget()
     start_time = time.time()
-    synthetic_header_df, header_metadata_df = generate_synthetic_data(
-        header_df, metadata_base_path, metadata_type="header", use_same_metadata_version=use_same_metadata_version
-    )
-    print(f"Time taken to generate synthetic header data: {time.time() - start_time:.2f} seconds")
+    with budget.stage("fit"):
+        data_metadata = load_metadata(tabluar_df, metadata_base_path, "data", use_same_metadata_version, profile)
+        synthesizer = fit_synthesizer(tabluar_df, data_metadata, time_budget, progressive_steps, profile)
+    print(f"Time taken to fit synthesizer: {time.time() - start_time:.2f} seconds")
     print('############################################################################')
-    
-    #date_columns = ['date_of_birth','date_of_service','billing_cycle_end_date','check_date','date_prescription_written','invoiced_date','cardholder_date_of_birth','adjudication_date']  # Replace with actual column names that are dates  # Replace with actual date column names
-    date_columns = ['da']  # Replace with actual column names that are dates  # Replace with actual date column names
-    
+
     start_time = time.time()
-    tabluar_df = process_file_data(raw_df[1:], de_file_layout, date_columns)
-    print(f"Time taken to process data into Dataframe: {time.time() - start_time:.2f} seconds")
-    
+    num_rows = int(round(len(tabluar_df) * scale))
+    written_rows = 0
+    written_totals = [0] * len(trailer_amount_columns)
+    print(f"Sampling {num_rows} rows ({scale}x) with {sampling_workers} worker processes...")
+    with budget.stage("emit"):
+        # The trailer is only known after the last batch; a trailer overflow or failed worker must not
+        # leave a trailer-less file at the output path
+        with cio.open_output_atomic(output_file_path) as outfile:
+            outfile.write(format_header_records(synthetic_header, codec))
+            for row_count, totals, text in stream_scaled_records(synthesizer, num_rows, codec, date_columns,
+                                                                  sampling_workers, sampling_seed):
+                outfile.write(text)
+                written_rows += row_count
+                written_totals = [total + batch_total for total, batch_total in zip(written_totals, totals)]
+                budget.check("sample")
+            outfile.write("".join(record + '\n' for record in cd_df['CD_Record']))
+            outfile.write(format_page_trailer(written_rows, *written_totals) + '\n')
+    elapsed = time.time() - start_time
+    print(f"Data written to {output_file_path}.")
+    print(f"Time taken to sample and write {written_rows} rows: {elapsed:.2f} seconds "
+          f"({written_rows / max(elapsed, 1e-9):.0f} rows/second)")
+
+########################### Incremental mode ################################
+# Leading input bytes hashed to recognise the same (appended-to) file across runs
+CHECKPOINT_HEAD_BYTES = 1024 * 1024
+
+def checkpoint_path(output_file_path):
+    return f"{os.path.splitext(output_file_path)[0]}_checkpoint.json"
+
+def model_path(output_file_path):
+    return f"{os.path.splitext(output_file_path)[0]}_model.pkl"
+
+def file_digest(path, size=None):
+    # SHA-256 of the first size bytes of a file (the whole file when size is None)
+    with open(path, 'rb') as infile:
+        return hashlib.sha256(infile.read() if size is None else infile.read(size)).hexdigest()
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as infile:
+        return json.load(infile)
+
+def save_checkpoint(path, checkpoint):
+    # Replace the checkpoint atomically so an interrupted run leaves the previous one intact
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as outfile:
+        json.dump(checkpoint, outfile, indent=4)
+    os.replace(tmp_path, path)
+
+def checkpoint_mismatch(checkpoint, codec):
+    # Why the checkpoint cannot be resumed from, or None when only appended data is new
+    if checkpoint is None:
+        return "no checkpoint"
+    if checkpoint["layout_hash"] != codec.layout_hash:
+        return "the file layout changed"
+    if checkpoint["input_path"] != os.path.abspath(file_path) or os.path.getsize(file_path) < checkpoint["byte_offset"]:
+        return "the input file was replaced or truncated"
+    if file_digest(file_path, checkpoint["head_bytes"]) != checkpoint["head_digest"]:
+        return "the start of the input file changed"
+    if not os.path.exists(output_file_path) or os.path.getsize(output_file_path) != checkpoint["output_size"]:
+        return "the output file changed since the last run"
+    if not os.path.exists(model_path(output_file_path)) or file_digest(model_path(output_file_path)) != checkpoint["model_digest"]:
+        return "the saved model is missing or changed"
+    return None
+
+def read_appended_lines(file_path, start_offset):
+    # Complete lines from start_offset on; a partially written last line is left for the next run
+    with open(file_path, 'rb') as infile:
+        infile.seek(start_offset)
+        data = infile.read()
+    end_offset = start_offset + data.rfind(b'\n') + 1
+    return par.read_range(file_path, (start_offset, end_offset)), end_offset
+
+def run_incremental(codec, use_same_metadata_version, time_budget, progressive_steps=None):
+    # Synthesize only the records appended since the checkpoint, insert them before the CD block and rewrite the trailer
+    if cio.detect_compression(file_path) is not None or cio.compression_from_extension(output_file_path):
+        raise ValueError("Incremental mode needs an uncompressed input and output file")
+    checkpoint = load_checkpoint(checkpoint_path(output_file_path))
+    reason = checkpoint_mismatch(checkpoint, codec)
+    if reason:
+        print(f"Starting a full incremental baseline: {reason}.")
+        checkpoint = None
+
+    start_time = time.time()
+    lines, end_offset = read_appended_lines(file_path, checkpoint["byte_offset"] if checkpoint else 0)
+    if checkpoint and not lines:
+        print("No new records since the last run.")
+        return
+    header_line = None if checkpoint else lines[0]
+    data_lines = lines if checkpoint else lines[1:]
+    tabluar_df = process_file_data(data_lines, codec, "DE", date_columns)
+    cd_df = process_cd_records(data_lines, codec)
+    print(f"Time taken to parse {len(lines)} new lines: {time.time() - start_time:.2f} seconds")
+
+    start_time = time.time()
+    if checkpoint:
+        with open(model_path(output_file_path), 'rb') as infile:
+            synthesizer = pickle.load(infile)
+    else:
+        header_df = process_file_data([header_line], codec, "HDR")
+        synthetic_header_df, _ = generate_synthetic_data(
+            header_df, metadata_base_path, metadata_type="header", use_same_metadata_version=use_same_metadata_version
+        )
+        data_metadata = load_metadata(tabluar_df, metadata_base_path, "data", use_same_metadata_version)
+        synthesizer = fit_synthesizer(tabluar_df, data_metadata, time_budget, progressive_steps)
+        with open(model_path(output_file_path), 'wb') as outfile:
+            pickle.dump(synthesizer, outfile)
+    # A fresh seed per run, so appended batches do not repeat earlier ones
+    run_number = checkpoint["runs"] if checkpoint else 0
+    synthesizer.reseed(derive_seed(sampling_seed, run_number))
+    synthetic_data = synthesizer.sample(num_rows=len(tabluar_df))
+    records = format_data_records(synthetic_data, codec, date_columns)
+    totals = trailer_totals(synthetic_data)
+    print(f"Time taken to synthesize {len(synthetic_data)} new records: {time.time() - start_time:.2f} seconds")
+
+    start_time = time.time()
+    new_cd_records = "".join(record + '\n' for record in cd_df['CD_Record'])
+    if checkpoint:
+        output_rows = checkpoint["output_rows"] + len(synthetic_data)
+        totals = [total + new_total for total, new_total in zip(checkpoint["totals"], totals)]
+        with open(output_file_path, 'r+') as outfile:
+            # Only the CD block and trailer after the records are read back and rewritten
+            outfile.seek(checkpoint["records_end"])
+            old_cd_records = "".join(line for line in outfile.readlines() if not codec.is_trailer(line))
+            outfile.seek(checkpoint["records_end"])
+            outfile.truncate()
+            outfile.write(records)
+            records_end = outfile.tell()
+            outfile.write(old_cd_records + new_cd_records)
+            outfile.write(format_page_trailer(output_rows, *totals) + '\n')
+    else:
+        output_rows = len(synthetic_data)
+        with open(output_file_path, 'w') as outfile:
+            outfile.write(format_header_records(synthetic_header_df, codec))
+            outfile.write(records)
+            records_end = outfile.tell()
+            outfile.write(new_cd_records)
+            outfile.write(format_page_trailer(output_rows, *totals) + '\n')
+    print(f"Time taken to update {output_file_path}: {time.time() - start_time:.2f} seconds")
+
+    head_bytes = min(end_offset, CHECKPOINT_HEAD_BYTES)
+    save_checkpoint(checkpoint_path(output_file_path), {
+        "input_path": os.path.abspath(file_path),
+        "byte_offset": end_offset,
+        "line_count": (checkpoint["line_count"] if checkpoint else 0) + len(lines),
+        "head_bytes": head_bytes,
+        "head_digest": file_digest(file_path, head_bytes),
+        "layout_hash": codec.layout_hash,
+        "model_digest": file_digest(model_path(output_file_path)),
+        "output_rows": output_rows,
+        "totals": totals,
+        "records_end": records_end,
+        "output_size": os.path.getsize(output_file_path),
+        "runs": run_number + 1,
+    })
+    print(f"Checkpoint saved at byte {end_offset} of {file_path}.")
+
+#############################################################################
+
+def check_mode_options(pipelined, incremental, scale, shards, partitioned, reason=None):
+    # Raise for option combinations a mode would otherwise silently ignore
+    options = [name for name, enabled in (("scale", scale != 1), ("shards", bool(shards)),
+                                          ("partitioned", partitioned)) if enabled]
+    for mode, enabled in (("Incremental", incremental), ("Pipelined", pipelined)):
+        unsupported = options + (["pipelined"] if mode == "Incremental" and pipelined else [])
+        if enabled and unsupported:
+            chosen_by = f" (chosen by {reason})" if reason and mode == "Pipelined" else ""
+            raise ValueError(f"{mode} mode{chosen_by} does not support: {', '.join(unsupported)}")
+    if scale != 1 and (shards or partitioned):
+        raise ValueError("Scaled sampling writes one file from one fitted model; it does not support shards or partitioned")
+
+import time  # Add this import at the top of your script
+
+def finish_run(budget, total_start_time):
+    # Run epilogue shared by every mode: memory peaks and total execution time
+    budget.print_peaks()
+    total_time_taken = time.time() - total_start_time
+    print(f"\nTotal time taken for the entire process: {total_time_taken:.2f} seconds")
 
+    print("\nProcessing complete.")
+    print('############################################################################')
+
+def main(use_same_metadata_version=True, time_budget=synthesis_time_budget, pipelined=pipelined_mode,
+         memory_budget=memory_budget_bytes, parse_only=False, parse_workers=parallel_parse_workers,
+         progressive_steps=progressive_fit_steps, partitioned=partitioned_mode, shards=output_shards,
+         scale=scale_factor, incremental=incremental_mode):
+    # Track the total execution time
+    total_start_time = time.time()  # Start the total timer
+    budget = mb.MemoryBudget(memory_budget)
+    print('############################################################################')
     start_time = time.time()
-    cd_df = process_cd_records(raw_df)
-    print(f"Time taken to process CD records into Dataframe: : {time.time() - start_time:.2f} seconds")
+    codec = read_file_layout(file_layout)
+    print(f"Time taken to compile file layout: {time.time() - start_time:.2f} seconds")
+    fit_rows = None
+    if not pipelined and not parse_only and not incremental and budget.would_exceed(mb.estimate_frame_bytes(cio.uncompressed_size(file_path))):
+        if memory_budget_fallback != 'chunked':
+            budget.check("load", mb.estimate_frame_bytes(cio.uncompressed_size(file_path)))
+        print(f"Full-frame processing would exceed the memory budget, switching to chunked pipelined mode "
+              f"fitted on at most {chunked_fit_rows} sampled rows.")
+        pipelined = True
+        fit_rows = chunked_fit_rows
+    check_mode_options(pipelined, incremental, scale, shards, partitioned,
+                       "the memory-budget fallback" if fit_rows else None)
+
+    if incremental:
+        run_incremental(codec, use_same_metadata_version, time_budget, progressive_steps)
+        finish_run(budget, total_start_time)
+        return
+
+    if pipelined:
+        run_pipelined(use_same_metadata_version, time_budget, codec, date_columns, budget, progressive_steps, fit_rows)
+        finish_run(budget, total_start_time)
+        return
+
+    cache_key = None
+    cached_frames = None
+    data_profile = None
+    if parse_cache_quota is not None:
+        start_time = time.time()
+        cache_key = pc.cache_key(file_path, file_layout, date_columns)
+        cached_frames = pc.load_parsed_frames(parse_cache_dir, cache_key)
+        print(f"Time taken to check parse cache: {time.time() - start_time:.2f} seconds")
+
+    with budget.stage("parse"):
+        if cached_frames is not None:
+            header_df, tabluar_df, cd_df = cached_frames
+            if profile_columns:
+                # Only the profile stored in this entry describes the same input
+                data_profile = pc.load_profile(parse_cache_dir, cache_key)
+        elif parse_workers:
+            print('############################################################################')
+            start_time = time.time()
+            parsed_ranges = par.parse_file_parallel(file_path, functools.partial(parse_line_batch, codec, date_columns), parse_workers)
+            header_df, tabluar_df, cd_df, data_profile = combine_parsed_batches(parsed_ranges)
+            del parsed_ranges
+            print(f"Time taken to load and process file data in parallel: {time.time() - start_time:.2f} seconds")
+        else:
+            print('############################################################################')
+            start_time = time.time()
+            header_df, tabluar_df, cd_df, data_profile = parse_file_batches(file_path, codec, date_columns)
+            print(f"Time taken to load and process file data: {time.time() - start_time:.2f} seconds")
+
+        if cached_frames is None and cache_key is not None:
+            pc.store_parsed_frames(parse_cache_dir, cache_key, header_df, tabluar_df, cd_df, parse_cache_quota,
+                                   data_profile)
+        if data_profile is not None:
+            data_profile.save(profile_path(metadata_base_path, "data"))
+    print('############################################################################')
+
     print(cd_df)
 
     # Write the DataFrame to a CSV file in the same path
     tabluar_df.to_csv('dataframe_output_presdv.csv', index=False,mode='w')
     print('Write dataframe with header completed successfully')
 
+    if parse_only:
+        # Parse-only jobs stop here, before any synthesis module is imported
+        finish_run(budget, total_start_time)
+        return
+
+    start_time = time.time()
+    with budget.stage("header"):
+        synthetic_header_df, header_metadata_df = generate_synthetic_data(
+            header_df, metadata_base_path, metadata_type="header", use_same_metadata_version=use_same_metadata_version
+        )
+    print(f"Time taken to generate synthetic header data: {time.time() - start_time:.2f} seconds")
+    print('############################################################################')
+
+    if scale != 1:
+        # Load-test volume is streamed straight to the output; it is not evaluated against the input
+        run_scaled(tabluar_df, cd_df, codec, synthetic_header_df, scale, use_same_metadata_version, time_budget,
+                   progressive_steps, data_profile, budget)
+        finish_run(budget, total_start_time)
+        return
 
     #Apply function to generate random numbers based on the length of each entry in 
     # start_time = time.time()
@@ -257,9 +985,16 @@ def main(use_same_metadata_version=True):
     # print(f"Time taken to generate random numbers for sensitive columns: {time.time() - start_time:.2f} seconds")
 
     start_time = time.time()
-    synthetic_data, data_metadata = generate_synthetic_data(
-        tabluar_df, metadata_base_path, metadata_type="data", use_same_metadata_version=use_same_metadata_version
-    )
+    with budget.stage("synthesize"):
+        if partitioned:
+            synthetic_data, data_metadata = run_partitioned(
+                tabluar_df, codec, partition_key_columns, use_same_metadata_version, time_budget, profile=data_profile
+            )
+        else:
+            synthetic_data, data_metadata = generate_synthetic_data(
+                tabluar_df, metadata_base_path, metadata_type="data", use_same_metadata_version=use_same_metadata_version,
+                time_budget=time_budget, progressive_steps=progressive_steps, profile=data_profile
+            )
     print(f"Time taken to generate synthetic data: {time.time() - start_time:.2f} seconds")
 
     # Write the DataFrame to a CSV file in the same path
@@ -269,23 +1004,24 @@ def main(use_same_metadata_version=True):
     print('############################################################################')
 
     start_time = time.time()
-    evaluate_synthetic_data(header_df, synthetic_header_df, header_metadata_df)
-    evaluate_synthetic_data(tabluar_df, synthetic_data, data_metadata)
+    with budget.stage("evaluate"):
+        if quick_evaluation and data_profile is not None:
+            quick_evaluate(data_profile, synthetic_data, date_columns)
+        else:
+            evaluate_synthetic_data(header_df, synthetic_header_df, header_metadata_df)
+            evaluate_synthetic_data(tabluar_df, synthetic_data, data_metadata)
     print(f"Time taken to evaluate synthetic data: {time.time() - start_time:.2f} seconds")
 
     print('############################################################################')
 
     start_time = time.time()
-    write_output_file(output_file_path, synthetic_data, cd_df, de_file_layout, synthetic_header_df, hdr_file_layout, date_columns)
+    with budget.stage("write"):
+        if shards:
+            write_sharded_output(output_file_path, synthetic_data, cd_df, codec, synthetic_header_df, date_columns, shards)
+        else:
+            write_output_file(output_file_path, synthetic_data, cd_df, codec, synthetic_header_df, date_columns)
     print(f"Time taken to write output file: {time.time() - start_time:.2f} seconds")
-    
-
-    #Calculate total execution time
-    total_time_taken = time.time() - total_start_time
-    print(f"\nTotal time taken for the entire process: {total_time_taken:.2f} seconds")
-
-    print("\nProcessing complete.")
-    print('############################################################################')
+    finish_run(budget, total_start_time)
 
 if __name__ == "__main__":
     main(use_same_metadata_version=True) 
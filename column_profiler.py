@@ -0,0 +1,277 @@
+import json
+import numpy as np
+import pandas as pd
+
+# HyperLogLog precision: 2**12 registers, about 1.6% standard error
+HLL_PRECISION = 12
+
+# Counters kept by the Misra-Gries top-k summary
+TOP_K_CAPACITY = 64
+
+# t-digest compression; more centroids means more accurate quantiles
+TDIGEST_COMPRESSION = 100
+
+################## Sketches ##############
+# Every sketch is updated with numpy/pandas operations over a batch's distinct values; no per-value Python loops
+
+class HyperLogLog:
+    # Mergeable distinct-count sketch
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None \
+            else np.frombuffer(registers, dtype=np.uint8).copy()
+
+    def add_many(self, values):
+        # values: array of distinct strings
+        hashed = pd.util.hash_array(np.asarray(values, dtype=object))
+        remainder_bits = 64 - self.precision
+        index = (hashed >> np.uint64(remainder_bits)).astype(np.int64)
+        remainder = hashed & np.uint64((1 << remainder_bits) - 1)
+        # frexp's exponent is the bit length; exact because the remainder fits in a double's mantissa
+        rank = (remainder_bits - np.frexp(remainder.astype(np.float64))[1] + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = (0.7213 / (1 + 1.079 / m)) * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+class TopK:
+    # Misra-Gries heavy hitters; counts are lower bounds that undercount by at most n / capacity
+    def __init__(self, capacity=TOP_K_CAPACITY, counts=None):
+        self.capacity = capacity
+        self.counts = pd.Series(counts or {}, dtype=np.int64)
+
+    def update(self, counts):
+        # counts: Series of value -> count. The batch is reduced to its own summary first;
+        # Misra-Gries summaries merge with their error bounds adding up
+        self.counts = self.counts.add(self._reduce(counts), fill_value=0).astype(np.int64)
+        self.counts = self._reduce(self.counts)
+
+    def _reduce(self, counts):
+        if len(counts) <= self.capacity:
+            return counts
+        cutoff = counts.nlargest(self.capacity + 1).iloc[-1]
+        return counts[counts > cutoff] - cutoff
+
+    def merge(self, other):
+        self.update(other.counts)
+
+    def most_common(self, k=10):
+        return [[value, int(count)] for value, count in self.counts.nlargest(k).items()]
+
+class TDigest:
+    # Merging t-digest: sorted points are grouped by the arcsine scale function, so clusters
+    # stay small in the tails and at most compression + 1 centroids are kept
+    def __init__(self, compression=TDIGEST_COMPRESSION, centroids=None):
+        self.compression = compression
+        centroids = np.asarray(centroids or [], dtype=np.float64).reshape(-1, 2)
+        self.means, self.weights = centroids[:, 0], centroids[:, 1]
+
+    def update(self, values, weights):
+        means = np.concatenate([self.means, np.asarray(values, dtype=np.float64)])
+        weights = np.concatenate([self.weights, np.asarray(weights, dtype=np.float64)])
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+        q = (np.cumsum(weights) - weights / 2) / weights.sum()
+        cluster = np.floor(self.compression * (np.arcsin(2 * q - 1) / np.pi + 0.5)).astype(np.int64)
+        _, cluster = np.unique(cluster, return_inverse=True)
+        self.weights = np.bincount(cluster, weights=weights)
+        self.means = np.bincount(cluster, weights=means * weights) / self.weights
+
+    def merge(self, other):
+        self.update(other.means, other.weights)
+
+    def quantile(self, q):
+        if not len(self.means):
+            return None
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), centers, self.means))
+
+    @property
+    def centroids(self):
+        return [[float(mean), float(weight)] for mean, weight in zip(self.means, self.weights)]
+
+################## Column and table profiles ##############
+class ColumnProfile:
+    # Streaming statistics for one column, updated batch by batch
+    def __init__(self, is_date=False, numeric_decoder=None):
+        # numeric_decoder: vectorised Series -> float Series (NaN where a value is not a number)
+        self.is_date = is_date
+        self.numeric_decoder = numeric_decoder
+        self.is_amount = numeric_decoder is not None
+        self.rows = 0
+        self.nulls = 0
+        self.hll = HyperLogLog()
+        self.top_k = TopK()
+        self.tdigest = TDigest()
+        self.numeric_rows = 0
+        self.min_length = None
+        self.max_length = None
+        self.date_min = None
+        self.date_max = None
+
+    def update(self, values):
+        # Fold one batch of raw string values into the sketches
+        values = pd.Series(values, dtype=object)
+        counts = values.value_counts(sort=False)
+        self.rows += len(values)
+        self.nulls += int(values.isna().sum()) + int(counts.get("", 0))
+        counts = counts.drop("", errors='ignore')
+        if counts.empty:
+            return
+        # Distinct values only: every sketch here is insensitive to repeats or takes weights
+        distinct = pd.Series(counts.index, dtype=object)
+        self.top_k.update(counts)
+        self.hll.add_many(distinct.to_numpy())
+
+        lengths = distinct.str.len()
+        self._extend("min_length", int(lengths.min()), min)
+        self._extend("max_length", int(lengths.max()), max)
+        if self.is_date:
+            dates = distinct[(lengths == 8) & distinct.str.isdigit()]
+            if len(dates):
+                self._extend("date_min", dates.min(), min)
+                self._extend("date_max", dates.max(), max)
+
+        numbers = self.numeric_decoder(distinct) if self.numeric_decoder else pd.to_numeric(distinct, errors='coerce')
+        numeric = numbers.notna().to_numpy()
+        if numeric.any():
+            self.numeric_rows += int(counts.to_numpy()[numeric].sum())
+            self.tdigest.update(numbers.to_numpy(dtype=np.float64)[numeric], counts.to_numpy()[numeric])
+
+    def _extend(self, name, value, pick):
+        current = getattr(self, name)
+        setattr(self, name, value if current is None else pick(current, value))
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.numeric_rows += other.numeric_rows
+        self.hll.merge(other.hll)
+        self.top_k.merge(other.top_k)
+        self.tdigest.merge(other.tdigest)
+        for name, pick in (("min_length", min), ("max_length", max), ("date_min", min), ("date_max", max)):
+            if getattr(other, name) is not None:
+                self._extend(name, getattr(other, name), pick)
+
+    def cardinality(self):
+        return self.hll.estimate()
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "cardinality": self.cardinality(),
+            "top_k": self.top_k.most_common(TOP_K_CAPACITY),
+            "numeric_rows": self.numeric_rows,
+            "quantiles": {str(q): self.tdigest.quantile(q) for q in (0.0, 0.01, 0.25, 0.5, 0.75, 0.99, 1.0)},
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+            "date_min": self.date_min,
+            "date_max": self.date_max,
+            "is_date": self.is_date,
+            "is_amount": self.is_amount,
+            "hll_registers": self.hll.registers.tobytes().hex(),
+            "tdigest_centroids": self.tdigest.centroids,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls(is_date=data["is_date"])
+        profile.is_amount = data["is_amount"]
+        profile.rows = data["rows"]
+        profile.nulls = data["nulls"]
+        profile.numeric_rows = data["numeric_rows"]
+        profile.hll = HyperLogLog(registers=bytes.fromhex(data["hll_registers"]))
+        profile.top_k = TopK(counts=dict(data["top_k"]))
+        profile.tdigest = TDigest(centroids=data["tdigest_centroids"])
+        for name in ("min_length", "max_length", "date_min", "date_max"):
+            setattr(profile, name, data[name])
+        return profile
+
+class TableProfile:
+    # Column profiles of one table, built from the decoded columns of each parsed batch
+    def __init__(self, date_columns=(), numeric_decoders=None):
+        self.date_columns = list(date_columns)
+        self.numeric_decoders = numeric_decoders or {}
+        self.columns = {}
+
+    def update_columns(self, columns):
+        # columns: {column_name: [raw string values]} as returned by LayoutCodec.decode_columns
+        for name, values in columns.items():
+            if name not in self.columns:
+                self.columns[name] = ColumnProfile(name in self.date_columns, self.numeric_decoders.get(name))
+            self.columns[name].update(values)
+
+    def merge(self, other):
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+        return self
+
+    def rows(self):
+        return max((column.rows for column in self.columns.values()), default=0)
+
+    def save(self, path):
+        with open(path, 'w') as outfile:
+            json.dump({name: column.to_dict() for name, column in self.columns.items()}, outfile, indent=4)
+        print(f"Column profile saved as {path}")
+
+    @classmethod
+    def load(cls, path):
+        profile = cls()
+        with open(path, 'r') as infile:
+            for name, data in json.load(infile).items():
+                profile.columns[name] = ColumnProfile.from_dict(data)
+        profile.date_columns = [name for name, column in profile.columns.items() if column.is_date]
+        return profile
+
+################## Uses of a profile ##############
+def infer_metadata(profile):
+    # SingleTableMetadata dict inferred from the profile instead of rescanning the frame
+    columns = {}
+    for name, column in profile.columns.items():
+        non_null = column.rows - column.nulls
+        if column.is_date:
+            columns[name] = {"sdtype": "datetime", "datetime_format": "%Y%m%d"}
+        elif column.is_amount or (non_null and column.numeric_rows == non_null):
+            # The frame keeps digit strings as strings; prepare_for_fit decodes overpunch amounts
+            # and masks ID-like digit columns, which both start from categorical
+            columns[name] = {"sdtype": "categorical"}
+        elif non_null and column.cardinality() >= 0.99 * non_null and non_null > 1:
+            columns[name] = {"sdtype": "id"}
+        else:
+            columns[name] = {"sdtype": "categorical"}
+    return {"METADATA_SPEC_VERSION": "SINGLE_TABLE_V1", "columns": columns}
+
+def compare_profiles(real, synthetic):
+    # Quick fidelity check: per-column null rate, cardinality and top-k overlap; returns (score, details)
+    details = {}
+    for name, real_column in real.columns.items():
+        synthetic_column = synthetic.columns.get(name)
+        if synthetic_column is None or not real_column.rows or not synthetic_column.rows:
+            continue
+        null_gap = abs(real_column.nulls / real_column.rows - synthetic_column.nulls / synthetic_column.rows)
+        real_top = dict(real_column.top_k.most_common(10))
+        synthetic_top = dict(synthetic_column.top_k.most_common(10))
+        overlap = len(set(real_top) & set(synthetic_top)) / max(1, len(real_top))
+        cardinality_ratio = (min(real_column.cardinality(), synthetic_column.cardinality())
+                             / max(1, real_column.cardinality(), synthetic_column.cardinality()))
+        details[name] = {
+            "null_rate_gap": round(null_gap, 4),
+            "top_k_overlap": round(overlap, 4),
+            "cardinality_ratio": round(cardinality_ratio, 4),
+        }
+    score = (sum((1 - d["null_rate_gap"] + d["top_k_overlap"] + d["cardinality_ratio"]) / 3 for d in details.values())
+             / max(1, len(details)))
+    return score, details
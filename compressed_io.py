@@ -0,0 +1,153 @@
+import bz2
+import codecs
+import contextlib
+import gzip
+import io
+import locale
+import lzma
+import os
+import queue
+import threading
+
+# Compressed formats by file extension
+COMPRESSORS = {
+    ".gz": gzip,
+    ".bz2": bz2,
+    ".xz": lzma,
+}
+
+# Leading bytes identifying each compressed format
+MAGIC_BYTES = {
+    b"\x1f\x8b": ".gz",
+    b"BZh": ".bz2",
+    b"\xfd7zXZ\x00": ".xz",
+}
+
+# Assumed expansion of compressed input when the format does not record its uncompressed size
+COMPRESSION_RATIO_ESTIMATE = 10
+
+# Size of decompressed chunks handed from the background thread to the reader
+CHUNK_SIZE = 1024 * 1024
+
+# Decompressed chunks buffered ahead of the reader
+QUEUE_SIZE = 8
+
+################## Format detection ##############
+def detect_compression(file_path):
+    # Return the compression extension of a file from its magic bytes, or None
+    with open(file_path, 'rb') as infile:
+        head = infile.read(6)
+    for magic, extension in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return extension
+    return None
+
+def compression_from_extension(file_path):
+    # Return the compression extension named by a path, or None for plain text
+    extension = os.path.splitext(file_path)[1].lower()
+    return extension if extension in COMPRESSORS else None
+
+def uncompressed_size(file_path):
+    # Best estimate of a file's decompressed size in bytes, for memory planning
+    compressed_size = os.path.getsize(file_path)
+    compression = detect_compression(file_path)
+    if compression is None:
+        return compressed_size
+    if compression == ".gz" and compressed_size * COMPRESSION_RATIO_ESTIMATE < 2 ** 32:
+        # The gzip trailer records the input size modulo 4 GiB; trusted while the input is well below that
+        with open(file_path, 'rb') as infile:
+            infile.seek(-4, os.SEEK_END)
+            return max(compressed_size, int.from_bytes(infile.read(4), 'little'))
+    return compressed_size * COMPRESSION_RATIO_ESTIMATE
+
+def strip_compression_suffix(file_path):
+    # Drop a trailing .gz/.bz2/.xz so output names derive from the inner file name
+    if compression_from_extension(file_path):
+        return os.path.splitext(file_path)[0]
+    return file_path
+
+################## Reading ##############
+def read_lines(file_path, chunk_size=CHUNK_SIZE, queue_size=QUEUE_SIZE):
+    # Yield the lines of a plain or compressed file, decompressing in a background thread
+    compression = detect_compression(file_path)
+    if compression is None:
+        with open(file_path, 'r') as infile:
+            yield from infile
+        return
+
+    chunks = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def decompress():
+        try:
+            with COMPRESSORS[compression].open(file_path, 'rb') as infile:
+                for chunk in iter(lambda: infile.read(chunk_size), b''):
+                    while not stop.is_set():
+                        try:
+                            chunks.put(chunk, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+        except Exception as error:
+            errors.append(error)
+        finally:
+            chunks.put(None)
+
+    thread = threading.Thread(target=decompress, name="decompress", daemon=True)
+    thread.start()
+
+    # Decode like open(..., 'r'): locale encoding with universal newlines
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+    decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+    pending = ""
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            lines = (pending + decoder.decode(chunk)).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + '\n'
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+    finally:
+        stop.set()
+        # Drain so a producer blocked on a full queue can finish
+        while thread.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+    if errors:
+        raise errors[0]
+
+################## Writing ##############
+def open_output(file_path):
+    # Open a text file for writing, compressed according to its extension
+    compression = compression_from_extension(file_path)
+    if compression is None:
+        return open(file_path, 'w')
+    return COMPRESSORS[compression].open(file_path, 'wt')
+
+@contextlib.contextmanager
+def open_output_atomic(file_path):
+    # Like open_output, but written to a partial file beside file_path that replaces it only once the
+    # block completes; on any error the partial file is removed, so a failed run never leaves a
+    # truncated file that looks complete
+    compression = compression_from_extension(file_path) or ""
+    directory, name = os.path.split(os.path.abspath(file_path))
+    partial_path = os.path.join(directory, f".{name}.{os.getpid()}.partial{compression}")
+    try:
+        with open_output(partial_path) as outfile:
+            yield outfile
+        os.replace(partial_path, file_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
@@ -1,37 +1,15 @@
 import csv
+import os
+import layout_codec as lc
 
-# Define field specifications (field name, length)
-fields = [
-    ("claim_number", 10),
-    ("patient_id", 8),
-    ("provider_id", 6),
-    ("service_date", 10),
-    ("admission_date", 10),
-    ("diagnosis_code", 7),
-    ("procedure_code", 5),
-    ("amount_due", 10),
-    ("claim_status", 1),
-    ("payer_id", 6),
-    ("date_of_birth", 10),
-    ("discharge_date", 10),
-    ("net_amount_due", 10),
-    ("social_security_number", 9),
-    ("credit_card_number", 16),
-    ("phone_number", 10),
-]
+# Field specifications (field name, length) come from the shared layout
+layout_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "health_claims_layout.csv")
+codec = lc.compile_layout(layout_file)
 
 def parse_record(record):
     """Parse a single positional record into a list of values."""
-    parsed_record = []
-    start = 0
-    
-    for field_name, length in fields:
-        # Extract the field using its length
-        field_value = record[start:start + length].strip()  # Remove padding spaces
-        parsed_record.append(field_value)
-        start += length
-    
-    return parsed_record
+    # Extract every field by its compiled offset and width, removing padding spaces
+    return codec.decode(record, "DE")
 
 def positional_to_csv(input_file_path, output_file_path):
     """Convert a positional health claims data file to a CSV format."""
@@ -39,7 +17,7 @@ def positional_to_csv(input_file_path, output_file_path):
         csv_writer = csv.writer(output_file)
         
         # Write the header (column names)
-        csv_writer.writerow([field_name for field_name, length in fields])
+        csv_writer.writerow(codec.columns("DE"))
         
         # Write each parsed record to the CSV
         for record in input_file:
@@ -1,25 +1,13 @@
+import os
 import random
 import datetime
 
-# Define field specifications (field name, length, type)
-fields = [
-    ("claim_number", 10, 'string'),           # Alphanumeric claim number
-    ("patient_id", 8, 'string'),              # Alphanumeric patient ID
-    ("provider_id", 6, 'string'),             # Alphanumeric provider ID
-    ("service_date", 10, 'date'),             # Date of service
-    ("admission_date", 10, 'date'),           # Admission date
-    ("diagnosis_code", 7, 'string'),          # Alphanumeric diagnosis code
-    ("procedure_code", 5, 'string'),          # Alphanumeric procedure code
-    ("amount_due", 10, 'amount'),             # Amount due, right aligned
-    ("claim_status", 1, 'string'),            # Claim status (1 character)
-    ("payer_id", 6, 'string'),                # Alphanumeric payer ID
-    ("date_of_birth", 10, 'date'),            # Patient's date of birth
-    ("discharge_date", 10, 'date'),           # Discharge date
-    ("net_amount_due", 10, 'amount'),         # Net amount due, right aligned
-    ("social_security_number", 9, 'ssn'),     # 9-digit SSN
-    ("credit_card_number", 16, 'credit_card'),# 16-digit credit card number
-    ("phone_number", 10, 'phone'),            # 10-digit phone number
-]
+import layout_codec as lc
+
+# Field specifications (field name, length, type) come from the shared layout
+layout_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "health_claims_layout.csv")
+codec = lc.compile_layout(layout_file)
+fields = codec.fields("DE")
 
 def random_string(length):
     """Generate a random alphanumeric string."""
@@ -47,13 +35,14 @@ def generate_record():
     """Generate a single health claim record with valid formats, including sensitive data."""
     record = []
     
-    for field_name, length, field_type in fields:
+    for field in fields:
+        length, field_type = field.width, field.data_type
         if field_type == 'string':
             value = random_string(length)
         elif field_type == 'date':
             value = random_date()
         elif field_type == 'amount':
-            value = f"{random.randint(1, 100000):>{length}}"  # Right aligned
+            value = str(random.randint(1, 100000))  # Right aligned by the codec
         elif field_type == 'ssn':
             value = random_ssn()
         elif field_type == 'credit_card':
@@ -62,11 +51,10 @@ def generate_record():
             value = random_phone_number()
         else:
             value = ''.join(' ' for _ in range(length))  # Empty string if unknown
-        
-        # Ensure the value is exactly the required length
-        record.append(f"{value[:length]:<{length}}")  # Pad with spaces if too short
+        record.append(value)
     
-    return ''.join(record)
+    # Pad or truncate every value to its exact width
+    return codec.encode(record, "DE")
 
 def generate_file(file_path, num_records=50000):
     """Generate a positional health claims data file with sensitive data."""
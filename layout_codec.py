@@ -0,0 +1,120 @@
+import collections
+import csv
+import hashlib
+import os
+import pickle
+
+# Record types copied through unchanged, by line prefix
+PASSTHROUGH_PREFIXES = ("CD",)
+
+# Prefix of the page trailer record
+TRAILER_PREFIX = "PT"
+
+# Data types padded on the left (right aligned); everything else is left aligned
+RIGHT_ALIGNED_TYPES = ("amount",)
+
+# Version of the pickled LayoutCodec/Field format; bump it whenever either class changes so a
+# compiled layout cached by older code is recompiled instead of unpickled into stale objects
+CODEC_FORMAT_VERSION = 1
+
+Field = collections.namedtuple("Field", "name offset width data_type align sensitive block_id")
+
+class LayoutCodec:
+    # Compiled fixed-width layout: field offsets, widths, types and padding per record type
+    def __init__(self, fields_by_type, layout_hash=None):
+        self.layout_hash = layout_hash
+        self.record_types = fields_by_type
+        self._slices = {record_type: [slice(field.offset, field.offset + field.width) for field in fields]
+                        for record_type, fields in fields_by_type.items()}
+
+    def fields(self, record_type):
+        return self.record_types[record_type]
+
+    def columns(self, record_type):
+        return [field.name for field in self.record_types[record_type]]
+
+    def record_width(self, record_type):
+        fields = self.record_types[record_type]
+        return fields[-1].offset + fields[-1].width if fields else 0
+
+    def block_key_columns(self, record_type):
+        # Columns flagged with a Block_ID in the layout; together they identify a block
+        return [field.name for field in self.record_types[record_type] if field.block_id]
+
+    def is_passthrough(self, line):
+        return line.startswith(PASSTHROUGH_PREFIXES)
+
+    def is_trailer(self, line):
+        return line.startswith(TRAILER_PREFIX)
+
+    ################## Decode ##############
+    def decode(self, line, record_type):
+        # Split one line into stripped field values
+        return [line[field_slice].strip() for field_slice in self._slices[record_type]]
+
+    def decode_columns(self, lines, record_type):
+        # Split many lines column by column into {column_name: [values]}
+        return {field.name: [line[field_slice].strip() for line in lines]
+                for field, field_slice in zip(self.record_types[record_type], self._slices[record_type])}
+
+    ################## Encode ##############
+    def encode(self, values, record_type):
+        # Pad and truncate values to their widths and join them into one line
+        parts = []
+        for field, value in zip(self.record_types[record_type], values):
+            value = str(value)[:field.width]
+            parts.append(value.rjust(field.width) if field.align == "right" else value.ljust(field.width))
+        return "".join(parts)
+
+    def encode_columns(self, columns, record_type):
+        # Encode {column_name: [values]} (or a DataFrame of strings) into a list of lines
+        padded = []
+        for field in self.record_types[record_type]:
+            width = field.width
+            if field.align == "right":
+                padded.append([str(value)[:width].rjust(width) for value in columns[field.name]])
+            else:
+                padded.append([str(value)[:width].ljust(width) for value in columns[field.name]])
+        return ["".join(parts) for parts in zip(*padded)]
+
+################## Compiler ##############
+def layout_hash(layout_path):
+    # SHA-256 of the layout file content
+    with open(layout_path, 'rb') as infile:
+        return hashlib.sha256(infile.read()).hexdigest()
+
+def parse_layout(layout_path, default_type="DE"):
+    # Read a layout CSV into Field lists keyed by record type, in file order
+    fields_by_type = {}
+    with open(layout_path, 'r', newline='') as infile:
+        for row in csv.DictReader(infile):
+            row = {key.strip(): (value or "").strip() for key, value in row.items() if key}
+            record_type = row.get("Type") or default_type
+            data_type = row.get("DataTtype", "varchar").lower()
+            fields = fields_by_type.setdefault(record_type, [])
+            offset = fields[-1].offset + fields[-1].width if fields else 0
+            fields.append(Field(
+                name=row["Column_Name"],
+                offset=offset,
+                width=int(row["Length"]),
+                data_type=data_type,
+                align="right" if data_type in RIGHT_ALIGNED_TYPES else "left",
+                sensitive=row.get("IsSensitive", "").upper() in ("Y", "YES", "TRUE", "1"),
+                block_id=row.get("Block_ID") or None,
+            ))
+    return fields_by_type
+
+def compile_layout(layout_path, cache_dir=None):
+    # Compile a layout CSV into a LayoutCodec, reusing the on-disk copy for an unchanged layout
+    digest = layout_hash(layout_path)
+    cache_path = os.path.join(cache_dir, f"layout_v{CODEC_FORMAT_VERSION}_{digest}.pkl") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as infile:
+            return pickle.load(infile)
+
+    codec = LayoutCodec(parse_layout(layout_path), digest)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, 'wb') as outfile:
+            pickle.dump(codec, outfile)
+    return codec
@@ -0,0 +1,83 @@
+import contextlib
+import os
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Bytes of parsed DataFrame per byte of fixed-width input (object columns of short strings)
+FRAME_EXPANSION_FACTOR = 12
+
+# Seconds between RSS samples while a stage runs
+SAMPLE_INTERVAL = 0.05
+
+class MemoryBudgetExceeded(MemoryError):
+    # Raised before a stage would push the process past its RSS ceiling
+    pass
+
+def current_rss():
+    # Resident set size of this process in bytes, or None when it cannot be read
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", 'r') as infile:
+            return int(infile.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def estimate_frame_bytes(input_bytes):
+    # Rough in-memory size of the parsed frames for an input of the given size
+    return input_bytes * FRAME_EXPANSION_FACTOR
+
+class MemoryBudget:
+    # Tracks peak RSS per stage and enforces an optional ceiling
+    def __init__(self, limit_bytes=None):
+        self.limit_bytes = limit_bytes
+        self.peaks = {}
+
+    def would_exceed(self, extra_bytes):
+        # True when allocating extra_bytes on top of the current RSS breaks the ceiling
+        rss = current_rss()
+        if self.limit_bytes is None or rss is None:
+            return False
+        return rss + extra_bytes > self.limit_bytes
+
+    def check(self, stage_name, extra_bytes=0):
+        # Fail fast instead of letting the kernel OOM-kill the job
+        if self.would_exceed(extra_bytes):
+            raise MemoryBudgetExceeded(
+                f"{stage_name}: RSS {current_rss() / 1024 ** 2:.0f} MiB + {extra_bytes / 1024 ** 2:.0f} MiB "
+                f"would exceed the {self.limit_bytes / 1024 ** 2:.0f} MiB budget"
+            )
+
+    @contextlib.contextmanager
+    def stage(self, stage_name):
+        # Sample RSS in the background while the stage runs and record its peak
+        self.check(stage_name)
+        done = threading.Event()
+        peak = [current_rss() or 0]
+
+        def sample():
+            while not done.wait(SAMPLE_INTERVAL):
+                peak[0] = max(peak[0], current_rss() or 0)
+
+        sampler = threading.Thread(target=sample, name=f"rss-{stage_name}", daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            done.set()
+            sampler.join()
+            peak[0] = max(peak[0], current_rss() or 0)
+            self.peaks[stage_name] = max(self.peaks.get(stage_name, 0), peak[0])
+        self.check(stage_name)
+
+    def print_peaks(self):
+        # Print the peak RSS seen in each stage
+        print("Peak memory per stage:")
+        for stage_name, peak in self.peaks.items():
+            print(f"  {stage_name:<12} {peak / 1024 ** 2:.1f} MiB")
+        if self.limit_bytes is not None:
+            print(f"  Budget       {self.limit_bytes / 1024 ** 2:.1f} MiB")
@@ -0,0 +1,55 @@
+import functools
+import io
+import locale
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import compressed_io as cio
+
+# Ranges smaller than this are not worth a worker process
+MIN_RANGE_BYTES = 1024 * 1024
+
+def newline_aligned_ranges(file_path, num_ranges, min_range_bytes=None):
+    # Split a file into at most num_ranges (start, end) byte ranges that each begin at a line start
+    min_range_bytes = min_range_bytes or MIN_RANGE_BYTES
+    file_size = os.path.getsize(file_path)
+    num_ranges = max(1, min(num_ranges, file_size // max(1, min_range_bytes)))
+    boundaries = [0]
+    with open(file_path, 'rb') as infile:
+        for index in range(1, num_ranges):
+            infile.seek(max(boundaries[-1], file_size * index // num_ranges))
+            # Move to the start of the next line so no record is split across ranges
+            infile.readline()
+            position = infile.tell()
+            if position >= file_size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def read_range(file_path, byte_range):
+    # Read the lines of one byte range, decoded like open(..., 'r')
+    start, end = byte_range
+    with open(file_path, 'rb') as infile:
+        infile.seek(start)
+        data = infile.read(end - start)
+    return list(io.TextIOWrapper(io.BytesIO(data), encoding=locale.getpreferredencoding(False)))
+
+def _parse_range(parse_lines, file_path, indexed_range):
+    # Worker: read one range and hand (range_index, lines) to the caller's parser
+    range_index, byte_range = indexed_range
+    return parse_lines((range_index, read_range(file_path, byte_range)))
+
+def parse_file_parallel(file_path, parse_lines, workers):
+    # Parse newline-aligned ranges of a file in worker processes, returning results in file order.
+    # parse_lines receives (range_index, lines); range 0 starts with the header line.
+    if cio.detect_compression(file_path) is not None:
+        # Compressed streams cannot be split at byte offsets
+        return [parse_lines((0, list(cio.read_lines(file_path))))]
+    ranges = newline_aligned_ranges(file_path, workers)
+    print(f"Parsing {len(ranges)} byte ranges with {workers} worker processes...")
+    if len(ranges) == 1:
+        return [_parse_range(parse_lines, file_path, (0, ranges[0]))]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(functools.partial(_parse_range, parse_lines, file_path), enumerate(ranges)))
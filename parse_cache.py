@@ -0,0 +1,92 @@
+import hashlib
+import os
+import pickle
+import shutil
+import pandas as pd
+
+# Default disk quota for the parse cache in bytes
+DEFAULT_QUOTA_BYTES = 2 * 1024 ** 3
+
+# Version of the parsed frame format; bump it whenever the parser's output changes so entries
+# written by an older parser are never served. 2: PT trailer lines are no longer parsed as DE rows
+PARSE_FORMAT_VERSION = 2
+
+# Parsed tables stored per cache entry
+CACHED_TABLES = ("header", "data", "cd")
+
+# Optional column profile of the data table, stored beside the frames it describes
+PROFILE_FILE = "profile.pkl"
+
+################## Cache keys ##############
+def file_hash(path, chunk_size=1024 * 1024):
+    # SHA-256 of a file's content, read in chunks
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_key(input_path, layout_path, date_columns=()):
+    # Key an entry by the parse format version, the input content, the layout content and the date columns
+    digest = hashlib.sha256()
+    digest.update(f"parse-format-{PARSE_FORMAT_VERSION}".encode())
+    digest.update(file_hash(input_path).encode())
+    digest.update(file_hash(layout_path).encode())
+    digest.update(",".join(sorted(date_columns)).encode())
+    return digest.hexdigest()
+
+def entry_size(entry_dir):
+    # Total bytes used by one cache entry
+    return sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+
+################## Load / store ##############
+def load_parsed_frames(cache_dir, key):
+    # Return (header_df, data_df, cd_df) for a cached key, or None on a miss
+    entry_dir = os.path.join(cache_dir, key)
+    paths = [os.path.join(entry_dir, f"{table}.pkl") for table in CACHED_TABLES]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    frames = tuple(pd.read_pickle(path) for path in paths)
+    # Touch the entry so eviction treats it as recently used
+    os.utime(entry_dir)
+    print(f"Loaded parsed frames from cache entry {key[:12]}.")
+    return frames
+
+def load_profile(cache_dir, key):
+    # Return the column profile stored with a cache entry, or None if it was stored without one
+    path = os.path.join(cache_dir, key, PROFILE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as infile:
+        return pickle.load(infile)
+
+def store_parsed_frames(cache_dir, key, header_df, data_df, cd_df, quota_bytes=DEFAULT_QUOTA_BYTES, profile=None):
+    # Save the parsed frames (and their column profile) under the key, then evict down to the quota
+    entry_dir = os.path.join(cache_dir, key)
+    tmp_dir = entry_dir + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    for table, frame in zip(CACHED_TABLES, (header_df, data_df, cd_df)):
+        frame.to_pickle(os.path.join(tmp_dir, f"{table}.pkl"))
+    if profile is not None:
+        with open(os.path.join(tmp_dir, PROFILE_FILE), 'wb') as outfile:
+            pickle.dump(profile, outfile)
+    if os.path.exists(entry_dir):
+        shutil.rmtree(entry_dir)
+    os.replace(tmp_dir, entry_dir)
+    print(f"Stored parsed frames in cache entry {key[:12]}.")
+    evict_entries(cache_dir, quota_bytes)
+
+def evict_entries(cache_dir, quota_bytes=DEFAULT_QUOTA_BYTES):
+    # Remove least recently used entries until the cache fits the quota
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        if os.path.isdir(entry_dir) and not name.endswith(".tmp"):
+            entries.append((os.path.getmtime(entry_dir), entry_size(entry_dir), entry_dir))
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, entry_dir in sorted(entries):
+        if total_size <= quota_bytes:
+            break
+        shutil.rmtree(entry_dir)
+        total_size -= size
+        print(f"Evicted parse cache entry {os.path.basename(entry_dir)[:12]}.")
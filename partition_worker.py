@@ -0,0 +1,12 @@
+import sys
+from synthesis_service import load_entry_point
+
+# Drain a partition queue created by a partitioned run of 09272024.py.
+# Run it on any host that sees the queue directory on shared storage:
+#   python partition_worker.py <queue_dir> [--wait]
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python partition_worker.py <queue_dir> [--wait]")
+        sys.exit(1)
+    pipeline = load_entry_point()
+    pipeline.drain_partition_queue(sys.argv[1], wait="--wait" in sys.argv[2:])
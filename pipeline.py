@@ -0,0 +1,153 @@
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Default number of batches buffered between two stages
+DEFAULT_QUEUE_SIZE = 4
+
+# Marks the end of the stream on a queue
+_END = object()
+
+################## Stages ##############
+class Stage:
+    # One step of a pipeline: applies func to every batch, in order
+    def __init__(self, name, func, workers=1, use_processes=False):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.use_processes = use_processes
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.wait_in_seconds = 0.0
+        self.wait_out_seconds = 0.0
+
+    def metrics(self, wall_seconds):
+        # Per-stage counters; utilization is busy time over available worker time
+        capacity = wall_seconds * self.workers
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "busy_seconds": self.busy_seconds,
+            "starved_seconds": self.wait_in_seconds,
+            "blocked_seconds": self.wait_out_seconds,
+            "utilization": self.busy_seconds / capacity if capacity > 0 else 0.0,
+        }
+
+def _timed_call(func, item):
+    # Run func on item and report how long it took (picklable for process pools)
+    start_time = time.perf_counter()
+    result = func(item)
+    return result, time.perf_counter() - start_time
+
+def _get(stage, in_queue):
+    start_time = time.perf_counter()
+    item = in_queue.get()
+    stage.wait_in_seconds += time.perf_counter() - start_time
+    return item
+
+def _put(stage, out_queue, item):
+    # Blocks while the next stage is behind, which is the backpressure
+    start_time = time.perf_counter()
+    out_queue.put(item)
+    stage.wait_out_seconds += time.perf_counter() - start_time
+
+def _run_source(stage, source, out_queue, errors):
+    try:
+        iterator = iter(source)
+        while not errors:
+            start_time = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            stage.busy_seconds += time.perf_counter() - start_time
+            stage.items += 1
+            _put(stage, out_queue, item)
+    except BaseException as error:
+        errors.append(error)
+    finally:
+        out_queue.put(_END)
+
+def _run_stage(stage, in_queue, out_queue, errors):
+    item = None
+    try:
+        if stage.workers <= 1 and not stage.use_processes:
+            while True:
+                item = _get(stage, in_queue)
+                if item is _END:
+                    break
+                if errors:
+                    continue
+                result, elapsed = _timed_call(stage.func, item)
+                stage.busy_seconds += elapsed
+                stage.items += 1
+                _put(stage, out_queue, result)
+            return
+
+        executor_class = ProcessPoolExecutor if stage.use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=stage.workers) as executor:
+            in_flight = collections.deque()
+            finished = False
+            while not finished or in_flight:
+                # Keep every worker busy, but never more than two batches per worker in flight
+                while not finished and len(in_flight) < stage.workers * 2:
+                    item = _get(stage, in_queue)
+                    if item is _END:
+                        finished = True
+                    elif not errors:
+                        in_flight.append(executor.submit(_timed_call, stage.func, item))
+                if in_flight:
+                    result, elapsed = in_flight.popleft().result()
+                    stage.busy_seconds += elapsed
+                    stage.items += 1
+                    _put(stage, out_queue, result)
+    except BaseException as error:
+        errors.append(error)
+        # Drain the input so upstream stages are not left blocked
+        while item is not _END:
+            item = in_queue.get()
+    finally:
+        out_queue.put(_END)
+
+################## Runner ##############
+def run_pipeline(source, stages, queue_size=DEFAULT_QUEUE_SIZE, name="pipeline"):
+    # Run source -> stages as concurrent threads joined by bounded queues.
+    # Returns the outputs of the last stage in order and the per-stage metrics.
+    source_stage = Stage("source", None)
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    errors = []
+    threads = [threading.Thread(target=_run_source, args=(source_stage, source, queues[0], errors),
+                                name=f"{name}-source", daemon=True)]
+    for index, stage in enumerate(stages):
+        threads.append(threading.Thread(target=_run_stage, args=(stage, queues[index], queues[index + 1], errors),
+                                        name=f"{name}-{stage.name}", daemon=True))
+
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    results = []
+    while True:
+        item = queues[-1].get()
+        if item is _END:
+            break
+        results.append(item)
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - start_time
+
+    if errors:
+        raise errors[0]
+    metrics = [stage.metrics(wall_seconds) for stage in [source_stage] + list(stages)]
+    return results, metrics
+
+def print_metrics(metrics, title="Pipeline"):
+    # Print per-stage utilization; the busiest stage is the bottleneck
+    print(f"{title} stage metrics:")
+    for row in metrics:
+        print(f"  {row['stage']:<10} items={row['items']:<6} busy={row['busy_seconds']:.2f}s "
+              f"starved={row['starved_seconds']:.2f}s blocked={row['blocked_seconds']:.2f}s "
+              f"utilization={row['utilization']:.0%}")
+    bottleneck = max(metrics, key=lambda row: row["utilization"])
+    print(f"  Bottleneck: {bottleneck['stage']}")
@@ -0,0 +1,166 @@
+import random
+import pandas as pd
+import util as ut
+
+# Last character of an overpunch amount for each digit, following util.get_return_value
+NEGATIVE_OVERPUNCH = "}ABCDEFGHI"
+POSITIVE_OVERPUNCH = "{JKLMNOPQR"
+# Translation table that turns either overpunch character back into its digit
+OVERPUNCH_DIGITS = str.maketrans({char: str(digit) for style in (NEGATIVE_OVERPUNCH, POSITIVE_OVERPUNCH)
+                                  for digit, char in enumerate(style)})
+
+# Categorical string columns with more distinct values than this are bucketed or masked
+HIGH_CARDINALITY_LIMIT = 1000
+
+# Share of the limit a profiled cardinality estimate must stay under to skip counting; covers sketch error
+PROFILE_CARDINALITY_MARGIN = 0.9
+
+# Most frequent categories kept when a high-cardinality column is bucketed
+BUCKET_TOP_K = 200
+
+# Category that stands in for every bucketed rare value while fitting
+RARE_TOKEN = "__rare__"
+
+# Original values kept per column to draw rare values and masked lengths from
+POOL_SIZE = 10000
+
+################## Overpunch amounts ##############
+def decode_overpunch(values):
+    # Decode overpunch strings to floats with util.get_return_value; blanks become NaN.
+    # Returns None when the column holds values that are not overpunch amounts.
+    decoded = {}
+    for value in values.dropna().unique():
+        if value == "":
+            continue
+        try:
+            decoded[value] = ut.get_return_value(value)
+        except ValueError:
+            return None
+    return values.map(decoded).astype(float)
+
+def overpunch_amounts(values):
+    # Vectorised decode of overpunch strings to floats, for profiling; values that do not parse become NaN
+    signs = values.str.endswith(tuple(NEGATIVE_OVERPUNCH)).map({True: -1.0, False: 1.0})
+    return pd.to_numeric(values.str.translate(OVERPUNCH_DIGITS), errors='coerce') * signs
+
+def encode_overpunch(amount, width, positive_style):
+    # Encode a number as a zero-filled overpunch string of the given width
+    if pd.isna(amount):
+        return ""
+    amount = int(round(amount))
+    digits = str(abs(amount)).zfill(width)[-width:]
+    if amount < 0:
+        return digits[:-1] + NEGATIVE_OVERPUNCH[int(digits[-1])]
+    if positive_style == "overpunch":
+        return digits[:-1] + POSITIVE_OVERPUNCH[int(digits[-1])]
+    return digits
+
+def positive_style_of(values):
+    # Whether positive amounts in the source end in a plain digit or an overpunch character
+    last_chars = values[values.str.len() > 0].str[-1]
+    overpunched = last_chars.isin(list(POSITIVE_OVERPUNCH)).sum()
+    return "overpunch" if overpunched > last_chars.str.isdigit().sum() else "digit"
+
+################## High-cardinality strings ##############
+def is_id_like(values):
+    # Digit-only strings (member, claim or reference numbers) are masked, not modelled
+    non_empty = values[values.str.len() > 0]
+    return len(non_empty) > 0 and bool(non_empty.str.isdigit().all())
+
+def mask_values(lengths, num_rows):
+    # Random digit strings with lengths drawn from the source, like generate_random_number
+    drawn = random.choices(lengths, k=num_rows) if lengths else [0] * num_rows
+    return [str(random.randint(10 ** (length - 1), 10 ** length - 1)) if length > 0 else "" for length in drawn]
+
+################## Fit / sample ##############
+def prepare_for_fit(df, metadata, overpunch_columns=(), profile=None):
+    # Return (train_df, fit_metadata, plan): overpunch amounts decoded to numbers, high-cardinality
+    # strings bucketed or masked. The caller's frame and metadata are left untouched. With a column
+    # profile, columns whose estimated cardinality is well under the limit skip the value count.
+    from sdv.metadata import SingleTableMetadata
+
+    metadata_dict = metadata.to_dict()
+    columns = metadata_dict["columns"]
+    train_df = df.copy(deep=False)
+    plan = {}
+
+    for column in overpunch_columns:
+        if column not in train_df.columns or train_df[column].dtype != object:
+            continue
+        amounts = decode_overpunch(train_df[column])
+        if amounts is None:
+            print(f"Column {column} is not an overpunch amount, keeping it categorical.")
+            continue
+        non_empty = train_df[column].dropna()
+        plan[column] = {
+            "kind": "overpunch",
+            "width": int(non_empty.str.len().max()) if len(non_empty) else 0,
+            "positive_style": positive_style_of(non_empty),
+        }
+        train_df[column] = amounts
+        columns[column] = {"sdtype": "numerical", "computer_representation": "Float"}
+        if metadata_dict.get("primary_key") == column:
+            # A primary key must stay an id; mostly-unique amounts are often detected as one
+            del metadata_dict["primary_key"]
+        print(f"Column {column} decoded from overpunch to a continuous amount.")
+
+    for column, column_metadata in list(columns.items()):
+        if column in plan or column not in train_df.columns or column_metadata.get("sdtype") != "categorical":
+            continue
+        if train_df[column].dtype != object:
+            continue
+        if profile is not None and column in profile.columns:
+            if profile.columns[column].cardinality() <= PROFILE_CARDINALITY_MARGIN * HIGH_CARDINALITY_LIMIT:
+                continue
+        values = train_df[column].fillna("")
+        counts = values.value_counts()
+        if len(counts) <= HIGH_CARDINALITY_LIMIT:
+            continue
+        if is_id_like(values):
+            lengths = values.str.len()
+            plan[column] = {"kind": "mask", "lengths": lengths.sample(min(POOL_SIZE, len(lengths))).tolist()}
+            train_df = train_df.drop(columns=[column])
+            del columns[column]
+            print(f"Column {column} has {len(counts)} distinct IDs, masking it instead of modelling it.")
+        else:
+            top = set(counts.index[:BUCKET_TOP_K])
+            rare = values[~values.isin(top)]
+            plan[column] = {"kind": "bucket", "rare_values": rare.sample(min(POOL_SIZE, len(rare))).tolist()}
+            train_df[column] = values.where(values.isin(top), RARE_TOKEN)
+            print(f"Column {column} has {len(counts)} categories, bucketing all but the top {BUCKET_TOP_K}.")
+
+    if not plan:
+        return df, metadata, plan
+    return train_df, SingleTableMetadata.load_from_dict(metadata_dict), plan
+
+def restore_after_sample(synthetic_data, plan, column_order=None):
+    # Turn sampled preprocessed columns back into their fixed-width string form
+    for column, step in plan.items():
+        if step["kind"] == "overpunch":
+            synthetic_data[column] = [encode_overpunch(amount, step["width"], step["positive_style"])
+                                      for amount in synthetic_data[column]]
+        elif step["kind"] == "mask":
+            synthetic_data[column] = mask_values(step["lengths"], len(synthetic_data))
+        elif step["kind"] == "bucket":
+            rare_rows = (synthetic_data[column] == RARE_TOKEN).to_numpy()
+            if rare_rows.any():
+                synthetic_data.loc[rare_rows, column] = random.choices(step["rare_values"], k=int(rare_rows.sum()))
+    if column_order is not None:
+        synthetic_data = synthetic_data[list(column_order)]
+    return synthetic_data
+
+class PreprocessedSynthesizer:
+    # Fitted synthesizer that restores preprocessed columns on every sample
+    def __init__(self, synthesizer, plan, column_order):
+        self.synthesizer = synthesizer
+        self.plan = plan
+        self.column_order = list(column_order)
+
+    def sample(self, num_rows):
+        return restore_after_sample(self.synthesizer.sample(num_rows=num_rows), self.plan, self.column_order)
+
+    def reseed(self, seed):
+        # Restart sampling from a fixed seed: SDV's model state and the draws for masked/bucketed columns
+        self.synthesizer.reset_sampling()
+        self.synthesizer._set_random_state(seed)
+        random.seed(seed)
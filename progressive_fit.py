@@ -0,0 +1,82 @@
+import time
+import pandas as pd
+
+# Training sizes tried in order; the full table is always the last step
+DEFAULT_STEPS = (10000, 50000, 250000)
+
+# Stop once the quality score improves by less than this between steps
+MIN_SCORE_GAIN = 0.005
+
+# Rows sampled and compared against the real data after each step
+EVALUATION_ROWS = 2000
+
+# Largest share of a subsample reserved for rows that carry rare categories
+RARE_CATEGORY_SHARE = 0.2
+
+RANDOM_STATE = 42
+
+def subsample(df, num_rows, metadata, random_state=RANDOM_STATE):
+    # Random subsample of num_rows rows. Categories too rare to be expected in a random sample of that
+    # size keep one row each, but those rows never take more than RARE_CATEGORY_SHARE of the subsample
+    if num_rows >= len(df):
+        return df
+    rare_below = len(df) / num_rows
+    keep = set()
+    for column, column_metadata in metadata.columns.items():
+        if column_metadata.get("sdtype") == "categorical" and column in df.columns:
+            counts = df[column].value_counts()
+            rare = df[column].isin(counts.index[counts < rare_below])
+            keep.update(df.loc[rare, column].drop_duplicates().index)
+    keep = pd.Index(sorted(keep))
+    limit = int(num_rows * RARE_CATEGORY_SHARE)
+    if len(keep) > limit:
+        keep = keep.to_series().sample(n=limit, random_state=random_state).sort_values().index
+    sampled = df.drop(index=keep).sample(n=num_rows - len(keep), random_state=random_state)
+    return pd.concat([df.loc[keep], sampled])
+
+def quality_score(real_sample, synthetic_sample, metadata):
+    # Column-shape / pair-trend quality score between 0 and 1
+    from sdv.evaluation.single_table import evaluate_quality
+    return evaluate_quality(real_sample, synthetic_sample, metadata, verbose=False).get_score()
+
+def progressive_fit(df, metadata, make_synthesizer, steps=DEFAULT_STEPS, min_gain=MIN_SCORE_GAIN,
+                    evaluation_rows=EVALUATION_ROWS):
+    # Fit on growing subsamples until the quality gain plateaus; returns (synthesizer, report)
+    start_time = time.time()
+    sizes = [size for size in steps if size < len(df)] + [len(df)]
+    real_sample = df.sample(n=min(evaluation_rows, len(df)), random_state=RANDOM_STATE)
+
+    best_synthesizer, best_score, best_rows, history = None, None, 0, []
+    last_fit_seconds, last_size = 0.0, 0
+    for size in sizes:
+        step_start = time.time()
+        train_df = subsample(df, size, metadata)
+        # Report the rows actually fitted rather than the step label
+        rows = len(train_df)
+        synthesizer = make_synthesizer()
+        synthesizer.fit(train_df)
+        last_fit_seconds, last_size = time.time() - step_start, rows
+
+        score = quality_score(real_sample, synthesizer.sample(num_rows=len(real_sample)), metadata)
+        history.append({"rows": rows, "score": round(score, 4), "seconds": round(time.time() - step_start, 2)})
+        print(f"Progressive fit on {rows} rows: quality {score:.4f} ({time.time() - step_start:.2f} seconds)")
+
+        gain = None if best_score is None else score - best_score
+        if best_score is None or score > best_score:
+            best_synthesizer, best_score, best_rows = synthesizer, score, rows
+        if gain is not None and gain < min_gain:
+            print(f"Quality gain {gain:.4f} is below {min_gain}, stopping at {rows} rows.")
+            break
+
+    total_seconds = time.time() - start_time
+    # A full fit is assumed to scale linearly from the last step's fit time
+    estimated_full_seconds = last_fit_seconds * len(df) / max(1, last_size)
+    report = {
+        "rows": best_rows,
+        "score": best_score,
+        "steps": history,
+        "seconds": round(total_seconds, 2),
+        "saved_seconds": round(max(0.0, estimated_full_seconds - total_seconds), 2),
+    }
+    print(f"Chose {report['rows']} of {len(df)} rows; estimated time saved {report['saved_seconds']:.2f} seconds.")
+    return best_synthesizer, report
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+# Entry point whose import cost is measured; importing it must not run main()
+entry_point = os.path.join(os.path.dirname(os.path.abspath(__file__)), "09272024.py")
+
+# Cumulative import budget in seconds for the parse-only path
+IMPORT_BUDGET_SECONDS = 1.5
+
+# Modules that only the synthesis and evaluation stages may load
+FORBIDDEN_MODULES = ("sdv", "torch", "ctgan", "copulas", "sdmetrics", "rdt")
+
+IMPORT_SCRIPT = (
+    "import importlib.util, sys; "
+    f"spec = importlib.util.spec_from_file_location('synthetic_pipeline', {entry_point!r}); "
+    "module = importlib.util.module_from_spec(spec); "
+    "sys.path.insert(0, {directory!r}); "
+    "spec.loader.exec_module(module)"
+).format(directory=os.path.dirname(entry_point))
+
+def measure_imports():
+    # Run the parse-only import under -X importtime and return {module: cumulative_us} for top-level imports
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+                            capture_output=True, text=True, check=True)
+    top_level = {}
+    loaded = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        loaded.append(name.strip())
+        # Nested imports are indented under their parent; only top-level ones add up
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, loaded
+
+def main(budget_seconds=IMPORT_BUDGET_SECONDS):
+    top_level, loaded = measure_imports()
+    total_seconds = sum(top_level.values()) / 1e6
+    print("Slowest top-level imports:")
+    for name, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {name:<30} {cumulative / 1e6:.3f} seconds")
+    print(f"Total import time for the parse-only path: {total_seconds:.3f} seconds (budget {budget_seconds:.3f})")
+
+    heavy = sorted({name.split(".")[0] for name in loaded if name.split(".")[0] in FORBIDDEN_MODULES})
+    if heavy:
+        print(f"FAIL: parse-only path imports synthesis modules: {', '.join(heavy)}")
+        return 1
+    if total_seconds > budget_seconds:
+        print("FAIL: import time is over budget")
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET_SECONDS))
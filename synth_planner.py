@@ -0,0 +1,145 @@
+import importlib
+import json
+import os
+import time
+
+# Candidate synthesizers, best quality first
+CANDIDATES = [
+    {"name": "ctgan_300", "class": "CTGANSynthesizer", "params": {"epochs": 300}},
+    {"name": "ctgan_50", "class": "CTGANSynthesizer", "params": {"epochs": 50}},
+    {"name": "gaussian_copula", "class": "GaussianCopulaSynthesizer", "params": {}},
+]
+
+# Candidate fitted when no time budget is given
+BASELINE_CANDIDATE = CANDIDATES[-1]
+
+# Fit seconds per unit of work above the fixed overhead, used until a candidate has recorded history.
+# Deliberately pessimistic (about 1.5x measured CPU timings) so a cold start errs towards the faster candidate
+DEFAULT_RATES = {
+    "ctgan_300": 1.8e-3,
+    "ctgan_50": 3.5e-4,
+    "gaussian_copula": 1.2e-5,
+}
+
+# Sample seconds per unit of sampled work, used until a candidate has recorded a sampled run
+DEFAULT_SAMPLE_RATES = {
+    "ctgan_300": 6e-6,
+    "ctgan_50": 6e-6,
+    "gaussian_copula": 3e-6,
+}
+
+# Fixed per-fit cost in seconds (model construction, transformers, per-epoch setup), measured as the
+# intercept of fit time against work. Subtracted from recorded fits before computing a rate, so
+# small fits do not inflate the estimate for large ones
+FIT_OVERHEAD = {
+    "ctgan_300": 7.0,
+    "ctgan_50": 3.0,
+    "gaussian_copula": 0.2,
+}
+
+# Module of each synthesizer class, imported only when a candidate is built
+SYNTHESIZER_MODULES = {
+    "GaussianCopulaSynthesizer": "sdv.single_table",
+    "CTGANSynthesizer": "sdv.single_table",
+}
+
+################## Cost model ##############
+def table_work(num_rows, num_columns, total_cardinality):
+    # Units of work for a table: every cell plus every distinct category to encode
+    return num_rows * num_columns + total_cardinality * num_columns
+
+def describe_table(df):
+    # Shape and cardinality of the training frame
+    cardinality = int(sum(df[column].nunique(dropna=True) for column in df.columns))
+    return {"rows": len(df), "columns": len(df.columns), "cardinality": cardinality}
+
+def load_history(history_dir):
+    # Load recorded fit/sample timings, one file per previous run
+    if not history_dir or not os.path.isdir(history_dir):
+        return []
+    history = []
+    for name in sorted(os.listdir(history_dir)):
+        if name.endswith(".json"):
+            with open(os.path.join(history_dir, name), 'r') as infile:
+                history.append(json.load(infile))
+    return history
+
+def record_run(history_dir, candidate_name, table, fit_seconds, sample_seconds=None):
+    # Write the timings of a finished run to its own file, so partition and sampling workers
+    # recording at the same time never overwrite each other. sample_seconds is None for fit-only runs
+    if not history_dir:
+        return
+    os.makedirs(history_dir, exist_ok=True)
+    run = {
+        "candidate": candidate_name,
+        "rows": table["rows"],
+        "columns": table["columns"],
+        "cardinality": table["cardinality"],
+        "fit_seconds": round(fit_seconds, 4),
+        "sample_seconds": None if sample_seconds is None else round(sample_seconds, 4),
+    }
+    run_name = f"{time.time_ns()}_{os.getpid()}_{candidate_name}"
+    tmp_path = os.path.join(history_dir, f"{run_name}.tmp")
+    with open(tmp_path, 'w') as outfile:
+        json.dump(run, outfile, indent=4)
+    os.replace(tmp_path, os.path.join(history_dir, f"{run_name}.json"))
+
+def median_rate(rates, default):
+    if not rates:
+        return default
+    rates.sort()
+    return rates[len(rates) // 2]
+
+def estimate_seconds(candidate_name, table, history):
+    # Estimate fit+sample time as the fixed fit overhead plus median per-unit fit and sample rates.
+    # Fit rates come from every recorded run, sample rates only from runs that also sampled
+    overhead = FIT_OVERHEAD[candidate_name]
+    fit_rates, sample_rates = [], []
+    for run in history:
+        if run["candidate"] != candidate_name:
+            continue
+        work = table_work(run["rows"], run["columns"], run["cardinality"])
+        if work <= 0:
+            continue
+        fit_rates.append(max(0.0, run["fit_seconds"] - overhead) / work)
+        if run.get("sample_seconds") is not None:
+            sample_rates.append(run["sample_seconds"] / work)
+    rate = (median_rate(fit_rates, DEFAULT_RATES[candidate_name])
+            + median_rate(sample_rates, DEFAULT_SAMPLE_RATES[candidate_name]))
+    return overhead + rate * table_work(table["rows"], table["columns"], table["cardinality"])
+
+################## Planner ##############
+def plan_synthesizer(df, time_budget, history_dir=None):
+    # Pick the best-quality candidate whose estimated cost fits the time budget
+    table = describe_table(df)
+    history = load_history(history_dir)
+    estimates = [(candidate, estimate_seconds(candidate["name"], table, history)) for candidate in CANDIDATES]
+    for candidate, estimate in estimates:
+        print(f"Estimated {candidate['name']}: {estimate:.2f} seconds")
+
+    fitting = [(candidate, estimate) for candidate, estimate in estimates if estimate <= time_budget]
+    if fitting:
+        chosen, estimate = fitting[0]
+    else:
+        chosen, estimate = min(estimates, key=lambda item: item[1])
+        print(f"No candidate fits the {time_budget} second budget, using the fastest one.")
+    print(f"Selected synthesizer {chosen['name']} (estimated {estimate:.2f} seconds).")
+    return chosen, table
+
+def create_synthesizer(candidate, metadata):
+    # Instantiate the SDV synthesizer described by a candidate
+    module = importlib.import_module(SYNTHESIZER_MODULES[candidate["class"]])
+    synthesizer_class = getattr(module, candidate["class"])
+    return synthesizer_class(metadata, **candidate["params"])
+
+def fit_and_sample(candidate, metadata, df, num_rows, table=None, history_dir=None):
+    # Fit and sample with the candidate, recording the timings for future plans
+    synthesizer = create_synthesizer(candidate, metadata)
+    start_time = time.time()
+    synthesizer.fit(df)
+    fit_seconds = time.time() - start_time
+    start_time = time.time()
+    synthetic_data = synthesizer.sample(num_rows=num_rows)
+    sample_seconds = time.time() - start_time
+    record_run(history_dir, candidate["name"], table or describe_table(df), fit_seconds, sample_seconds)
+    return synthetic_data
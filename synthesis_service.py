@@ -0,0 +1,187 @@
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import layout_codec as lc
+import parse_cache as pc
+
+# Localhost address the service listens on
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+
+# Jobs synthesized concurrently; the rest wait for a free worker
+WORKER_COUNT = os.cpu_count() or 1
+
+# Fitted models unused for this many seconds are evicted
+IDLE_TIMEOUT_SECONDS = 15 * 60
+
+def load_entry_point():
+    # Import 09272024.py as a module so its parse, synthesis and write functions can be reused
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "09272024.py")
+    spec = importlib.util.spec_from_file_location("synthetic_pipeline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+################## Warm state ##############
+class ModelCache:
+    # Compiled layouts and fitted synthesizers kept in memory between jobs
+    def __init__(self, idle_timeout=IDLE_TIMEOUT_SECONDS):
+        self.idle_timeout = idle_timeout
+        self.codecs = {}
+        self.models = {}
+        self.lock = threading.Lock()
+
+    def codec(self, layout_path, layout_cache_dir=None):
+        # Compiled layout, recompiled when the layout file changes
+        key = (layout_path, os.path.getmtime(layout_path))
+        with self.lock:
+            if key not in self.codecs:
+                self.codecs[key] = lc.compile_layout(layout_path, layout_cache_dir)
+            return self.codecs[key]
+
+    def model(self, key, fit):
+        # Return the fitted model for key, fitting it once even if several jobs ask at the same time
+        with self.lock:
+            entry = self.models.setdefault(key, {"model": None, "lock": threading.Lock(), "last_used": time.time()})
+        with entry["lock"]:
+            cached = entry["model"] is not None
+            if not cached:
+                entry["model"] = fit()
+            entry["last_used"] = time.time()
+        return entry, cached
+
+    def evict_idle(self):
+        # Drop models that have not been used within the idle timeout
+        cutoff = time.time() - self.idle_timeout
+        with self.lock:
+            for key in [key for key, entry in self.models.items() if entry["last_used"] < cutoff]:
+                del self.models[key]
+                print(f"Evicted idle model {key}.")
+
+    def status(self):
+        with self.lock:
+            return {
+                "layouts": len(self.codecs),
+                "models": [{"key": list(key), "idle_seconds": round(time.time() - entry["last_used"], 1)}
+                           for key, entry in self.models.items()],
+            }
+
+################## Jobs ##############
+def synthesize_file(pipeline, cache, input_path, output_path, layout_path=None, use_same_metadata_version=True,
+                    model_id=None):
+    # Parse input_path, sample from a warm (or freshly fitted) model and write output_path.
+    # Models are keyed by the input's content, so a warm model is only reused for the same data;
+    # a caller-supplied model_id opts in to sharing one model across files
+    start_time = time.time()
+    codec = cache.codec(layout_path or pipeline.file_layout, pipeline.layout_cache_dir)
+    header_df, tabluar_df, cd_df, _ = pipeline.parse_file_batches(input_path, codec, pipeline.date_columns)
+
+    header_metadata = pipeline.load_metadata(header_df, pipeline.metadata_base_path, "header", use_same_metadata_version)
+    data_metadata = pipeline.load_metadata(tabluar_df, pipeline.metadata_base_path, "data", use_same_metadata_version)
+    key = (
+        codec.layout_hash,
+        ("model", model_id) if model_id is not None else ("input", pc.file_hash(input_path)),
+        pipeline.get_latest_metadata_version(pipeline.metadata_base_path, "header"),
+        pipeline.get_latest_metadata_version(pipeline.metadata_base_path, "data"),
+    )
+
+    def fit():
+        return {
+            "header": pipeline.fit_synthesizer(header_df, header_metadata, record_timing=False),
+            "data": pipeline.fit_synthesizer(tabluar_df, data_metadata, pipeline.synthesis_time_budget),
+        }
+
+    entry, cached = cache.model(key, fit)
+    # Samplers are not safe to share between threads, so sampling a model is serialized
+    with entry["lock"]:
+        synthetic_header_df = entry["model"]["header"].sample(num_rows=len(header_df))
+        synthetic_data = entry["model"]["data"].sample(num_rows=len(tabluar_df))
+        entry["last_used"] = time.time()
+
+    pipeline.write_output_file(output_path, synthetic_data, cd_df, codec, synthetic_header_df, pipeline.date_columns)
+    return {
+        "output_path": output_path,
+        "rows": len(synthetic_data),
+        "model": "warm" if cached else "fitted",
+        "seconds": round(time.time() - start_time, 3),
+    }
+
+################## HTTP server ##############
+class SynthesisHandler(BaseHTTPRequestHandler):
+    # POST /synthesize {"input_path", "output_path", ["layout_path"], ["model_id"]}; GET /status
+    def do_GET(self):
+        if self.path != "/status":
+            self._reply(404, {"error": "unknown path"})
+            return
+        self._reply(200, self.server.cache.status())
+
+    def do_POST(self):
+        if self.path != "/synthesize":
+            self._reply(404, {"error": "unknown path"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            future = self.server.workers.submit(
+                synthesize_file, self.server.pipeline, self.server.cache,
+                request["input_path"], request["output_path"], request.get("layout_path"),
+                request.get("use_same_metadata_version", True), request.get("model_id"),
+            )
+            self._reply(200, future.result())
+        except KeyError as error:
+            self._reply(400, {"error": f"missing field {error}"})
+        except Exception as error:
+            self._reply(500, {"error": str(error)})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, workers=WORKER_COUNT, idle_timeout=IDLE_TIMEOUT_SECONDS):
+    # Run the service until interrupted, evicting idle models in the background
+    server = ThreadingHTTPServer((host, port), SynthesisHandler)
+    server.pipeline = load_entry_point()
+    server.cache = ModelCache(idle_timeout)
+    server.workers = ThreadPoolExecutor(max_workers=workers)
+
+    stop = threading.Event()
+
+    def evict_idle_models():
+        while not stop.wait(min(60, idle_timeout)):
+            server.cache.evict_idle()
+
+    threading.Thread(target=evict_idle_models, name="evict-idle", daemon=True).start()
+    print(f"Synthesis service listening on http://{host}:{port} with {workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        server.workers.shutdown()
+
+def submit_job(input_path, output_path, layout_path=None, model_id=None, host=SERVICE_HOST, port=SERVICE_PORT):
+    # Client helper: ask a running service to synthesize input_path into output_path
+    body = {"input_path": os.path.abspath(input_path), "output_path": os.path.abspath(output_path)}
+    if layout_path:
+        body["layout_path"] = os.path.abspath(layout_path)
+    if model_id is not None:
+        body["model_id"] = model_id
+    request = urllib.request.Request(f"http://{host}:{port}/synthesize", data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+if __name__ == "__main__":
+    serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else SERVICE_PORT)
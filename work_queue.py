@@ -0,0 +1,137 @@
+import os
+import pickle
+import shutil
+import socket
+import time
+import traceback
+
+# Seconds after which a claimed task whose worker went silent is handed out again
+DEFAULT_LEASE_SECONDS = 2 * 60 * 60
+
+# Seconds between polls of an empty queue
+POLL_SECONDS = 1.0
+
+QUEUE_DIRS = ("tasks", "pending", "running", "done", "failed", "results")
+
+################## Queue layout ##############
+def create_queue(queue_dir):
+    # Create the directories of a filesystem-backed queue on (shared) storage
+    for name in QUEUE_DIRS:
+        os.makedirs(os.path.join(queue_dir, name), exist_ok=True)
+
+def _write_atomic(path, payload):
+    # Write a pickle under a temporary name, then rename it into place
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as outfile:
+        pickle.dump(payload, outfile)
+    os.replace(tmp_path, path)
+
+def remove_queue(queue_dir):
+    # Delete the queue with its task payloads and results once the producer is done with them
+    shutil.rmtree(queue_dir, ignore_errors=True)
+
+def worker_id(pid=None):
+    # Owner recorded in a running marker: host and process id of the worker that claimed the task
+    return f"{socket.gethostname()} {pid or os.getpid()}"
+
+def _read(path):
+    with open(path, 'rb') as infile:
+        return pickle.load(infile)
+
+################## Producer ##############
+def enqueue(queue_dir, task_id, payload):
+    # Store the task payload, then publish it as pending
+    _write_atomic(os.path.join(queue_dir, "tasks", f"{task_id}.pkl"), payload)
+    open(os.path.join(queue_dir, "pending", task_id), 'w').close()
+
+def task_state(queue_dir, task_id):
+    for state in ("done", "failed", "running", "pending"):
+        if os.path.exists(os.path.join(queue_dir, state, task_id)):
+            return state
+    return None
+
+def wait_for_tasks(queue_dir, task_ids, poll_seconds=POLL_SECONDS, on_poll=None):
+    # Block until every task is done; raise if one failed. on_poll() runs before every poll,
+    # e.g. to fail the tasks of local workers that died.
+    remaining = set(task_ids)
+    while remaining:
+        if on_poll is not None:
+            on_poll()
+        for task_id in list(remaining):
+            state = task_state(queue_dir, task_id)
+            if state == "failed":
+                with open(os.path.join(queue_dir, "failed", task_id), 'r') as infile:
+                    raise RuntimeError(f"Task {task_id} failed:\n{infile.read()}")
+            if state == "done":
+                remaining.discard(task_id)
+        if remaining:
+            time.sleep(poll_seconds)
+
+def load_result(queue_dir, task_id):
+    return _read(os.path.join(queue_dir, "results", f"{task_id}.pkl"))
+
+def fail_abandoned(queue_dir, owner, reason):
+    # Mark the tasks a dead worker was running as failed, so waiters stop polling for them
+    running_dir = os.path.join(queue_dir, "running")
+    for task_id in os.listdir(running_dir):
+        path = os.path.join(running_dir, task_id)
+        try:
+            with open(path, 'r') as infile:
+                if infile.read() != owner:
+                    continue
+            with open(os.path.join(queue_dir, "failed", task_id), 'w') as outfile:
+                outfile.write(f"{owner}\n{reason}")
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+################## Consumer ##############
+def requeue_stale(queue_dir, lease_seconds=DEFAULT_LEASE_SECONDS):
+    # Return tasks whose lease expired (crashed worker or host) to pending
+    cutoff = time.time() - lease_seconds
+    running_dir = os.path.join(queue_dir, "running")
+    for task_id in os.listdir(running_dir):
+        path = os.path.join(running_dir, task_id)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.rename(path, os.path.join(queue_dir, "pending", task_id))
+                print(f"Requeued stale task {task_id}.")
+        except FileNotFoundError:
+            pass
+
+def claim(queue_dir, lease_seconds=DEFAULT_LEASE_SECONDS):
+    # Claim one pending task by renaming it to running; rename is atomic, so only one worker wins
+    requeue_stale(queue_dir, lease_seconds)
+    pending_dir = os.path.join(queue_dir, "pending")
+    for task_id in sorted(os.listdir(pending_dir)):
+        running_path = os.path.join(queue_dir, "running", task_id)
+        try:
+            os.rename(os.path.join(pending_dir, task_id), running_path)
+        except FileNotFoundError:
+            continue
+        # The running marker names its owner; its mtime is the start of the lease
+        with open(running_path, 'w') as outfile:
+            outfile.write(worker_id())
+        return task_id
+    return None
+
+def drain(queue_dir, handler, lease_seconds=DEFAULT_LEASE_SECONDS, wait=False, poll_seconds=POLL_SECONDS):
+    # Run handler(payload) for every claimable task; with wait=True keep polling for new tasks
+    processed = 0
+    while True:
+        task_id = claim(queue_dir, lease_seconds)
+        if task_id is None:
+            if not wait:
+                return processed
+            time.sleep(poll_seconds)
+            continue
+        running_path = os.path.join(queue_dir, "running", task_id)
+        try:
+            result = handler(_read(os.path.join(queue_dir, "tasks", f"{task_id}.pkl")))
+            _write_atomic(os.path.join(queue_dir, "results", f"{task_id}.pkl"), result)
+            os.rename(running_path, os.path.join(queue_dir, "done", task_id))
+        except Exception:
+            with open(os.path.join(queue_dir, "failed", task_id), 'w') as outfile:
+                outfile.write(f"{socket.gethostname()} pid {os.getpid()}\n{traceback.format_exc()}")
+            os.remove(running_path)
+        processed += 1